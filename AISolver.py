@@ -1,24 +1,126 @@
-from z3 import *
+import functools
+import math
 import random
+import time
+from contextlib import nullcontext
+from Board import Board
+from Frontier import Frontier
+from PatternCache import PatternCache
+
+_NO_PROFILE = nullcontext()  # Stands in for a profiler phase when profiling is off
+z3 = None  # Imported on first use, moves the rules resolve never load it
+
+
+def _import_z3():
+    # Loads Z3 the first time a solve needs it, importing it costs more than most moves
+    global z3
+    if z3 is None:
+        import z3 as module
+        z3 = module
+    return z3
+
+
+class SolverInterrupted(Exception):
+    """
+    Raised by a solve that was stopped through AISolver.interrupt().
+    """
+
+
+def _profiled(method):
+    # Records a public solver call with the profiler, if there is one
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self.profiler is None:
+            return method(self, *args, **kwargs)
+        with self.profiler.call(method.__name__):
+            return method(self, *args, **kwargs)
+    return wrapper
+
 
 class AISolver:
-    def __init__(self, grid):
+    MODES = ("full", "incremental", "frontier")
+
+    def __init__(self, grid, mode="full", num_mines=None, profiler=None, encoding=None,
+                 pattern_cache=None, exhaustive=False):
         """
         Initializes the AI Solver with the game grid.
 
         Args:
             grid (list of list of dict): A 2D list of cells in the game grid.
+            mode (str): "full" rebuilds the Z3 problem on every call, "incremental"
+                keeps one solver alive and only adds constraints for new cells,
+                "frontier" only encodes the cells next to revealed numbers and
+                solves each independent group of them separately.
+            num_mines (int): Total number of mines on the board, needed by
+                mine_probabilities().
+            profiler (Profiler): Optional, records the time of every phase of
+                each call along with problem sizes and Z3 statistics.
+            encoding (str or Encoding): How the number constraints are given to
+                Z3, a name from Encodings.ENCODINGS or an Encoding instance.
+                Defaults to Encodings.DEFAULT_ENCODING.
+            pattern_cache (PatternCache): Results of solved frontier components,
+                share one between solvers to reuse them across games. Defaults
+                to a cache private to this solver.
+            exhaustive (bool): Always ask Z3 for every cell it can prove. By
+                default deduce() stops at the rule tiers whenever they find a
+                safe cell, and Z3 only runs when they make no progress.
         """
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown solver mode: {mode}")
         self.grid = grid
         self.rows = len(grid)
         self.cols = len(grid[0])
-        self.true_positives = 0
-        self.false_positives = 0
-        self.false_negatives = 0
-        self.total_predictions = 0
-        self.predictions = []
-    
-        
+        self.mode = mode
+        self.num_mines = num_mines
+
+        # State for the incremental mode: the persistent solver, its variables,
+        # the revealed cells already encoded and the currently flagged cells
+        self._solver = None
+        self._cells = None
+        self._constrained = set()
+        self._flagged = set()
+        self._pending = None  # Cells reported through update(), None if nothing was reported
+        self._rescan = False
+
+        self.frontier = None  # Frontier of the last call in frontier mode
+        self.pattern_cache = pattern_cache if pattern_cache is not None else PatternCache()
+        self.z3_time = 0.0  # Seconds spent inside Z3 checks since the solver was created
+        self._interrupted = False
+        self.profiler = profiler
+        self._encoding = encoding
+        self.exhaustive = exhaustive
+        self.tier = None  # Tier that produced the last deduction: "local", "pairwise", "cache" or "z3"
+        self.probabilities = None  # Mine probabilities the last suggest_moves() computed, None if it needed none
+
+    @property
+    def encoding(self):
+        # Resolved on first use, the encodings are built on Z3. Every solve reads this
+        # before touching z3, so Z3 is loaded here even when an Encoding instance was passed
+        _import_z3()
+        if self._encoding is None or isinstance(self._encoding, str):
+            from Encodings import DEFAULT_ENCODING, get_encoding
+            self._encoding = get_encoding(self._encoding or DEFAULT_ENCODING)
+        return self._encoding
+
+    def update(self, cells=None):
+        """
+        Tells the solver which cells changed since the last call.
+
+        Only used by the incremental mode. Reporting the changed cells lets the
+        next call skip the full grid scan; calling it without arguments (or not
+        at all) makes the next call rescan the grid.
+
+        Args:
+            cells (iterable of tuples): Coordinates of revealed or (un)flagged cells.
+        """
+        if cells is None:
+            self._rescan = True
+        elif self._pending is None:
+            self._pending = set(cells)
+        else:
+            self._pending.update(cells)
+
+    @_profiled
     def identify_mines(self):
         """
         Uses Z3 solver to deduce the positions of mines based on revealed cells.
@@ -26,34 +128,177 @@ class AISolver:
         Returns:
             list of tuples: Coordinates of cells suspected to contain mines.
         """
-        solver = Solver()
-        cells = [[Bool(f"cell_{r}_{c}") for c in range(self.cols)] for r in range(self.rows)]
-        
-        # Add constraints based on the current state of the grid
-        for r in range(self.rows):
-            for c in range(self.cols):
-                cell_data = self.grid[r][c]
+        if self.mode == "incremental":
+            return self._identify_mines_incremental()
+        if self.mode == "frontier":
+            return self._identify_mines_frontier()
 
-                if cell_data["revealed"] and cell_data["number"] > 0:
-                    adjacent_cells = self._get_adjacent_cells(r, c)
+        solver, cells = self._build_full_solver()
 
-                    # Constraint: The sum of adjacent mines must match the cell's number
-                    adjacent_mines = [cells[ar][ac] for ar, ac in adjacent_cells]
-                    solver.add(Sum([If(mine, 1, 0) for mine in adjacent_mines]) == cell_data["number"])
+        # Solve the constraints
+        if self._check(solver) == z3.sat:
+            with self._phase("model"):
+                model = solver.model()
+                suspected_mines = [(r, c) for r in range(self.rows) for c in range(self.cols) if z3.is_true(model.evaluate(cells[r][c]))]
+            return suspected_mines
+        return []
+
+    def _build_full_solver(self):
+        """
+        Encodes the whole grid as one Z3 problem, one variable per cell.
 
+        Returns:
+            tuple: The Solver and the 2D list of its Bool variables.
+        """
+        with self._phase("build"):
+            solver = self.encoding.solver()
+            cells = [[z3.Bool(f"cell_{r}_{c}") for c in range(self.cols)] for r in range(self.rows)]
+
+            # Add constraints based on the current state of the grid, visiting only
+            # the cells each kind of constraint applies to
+            board = Board.of(self.grid)
+            revealed = board.revealed
+            numbered = list(zip(*(revealed & (board.numbers > 0)).nonzero()))
+            for r, c in numbered:
+                adjacent_cells = self._get_adjacent_cells(r, c)
+
+                # Constraint: The sum of adjacent mines must match the cell's number
+                adjacent_mines = [cells[ar][ac] for ar, ac in adjacent_cells]
+                solver.add(*self.encoding.exactly(adjacent_mines, int(board.numbers[r, c])))
+
+            flagged = list(zip(*board.flagged.nonzero()))
+            for r, c in flagged:
+                solver.add(cells[r][c])  # Force the flagged cell to be a mine
+
+            safe = list(zip(*(revealed & ~board.mines).nonzero()))
+            for r, c in safe:
+                solver.add(z3.Not(cells[r][c]))  # Revealed non-mine cells cannot be mines
+        self._count("constraints", len(numbered) + len(flagged) + len(safe))
+        self._count("variables", self.rows * self.cols)
+        return solver, cells
+
+    def _sync_incremental(self):
+        """
+        Brings the persistent solver up to date with the grid.
+
+        Only the cells reported through update() are examined, or the whole
+        grid if nothing was reported.
+        """
+        with self._phase("build"):
+            if self._solver is None:
+                self._solver = self.encoding.solver()
+                self._cells = [[z3.Bool(f"cell_{r}_{c}") for c in range(self.cols)] for r in range(self.rows)]
+                self._rescan = True
+
+            if self._pending is None or self._rescan:
+                # Only flagged and revealed cells can need an update
+                board = Board.of(self.grid)
+                self._flagged.clear()
+                changed = [(int(r), int(c)) for r, c in zip(*(board.state != 0).nonzero())]
+            else:
+                changed = self._pending
+            for r, c in changed:
+                cell_data = self.grid[r][c]
                 if cell_data["flagged"]:
-                    solver.add(cells[r][c])  # Force the flagged cell to be a mine
+                    self._flagged.add((r, c))
+                else:
+                    self._flagged.discard((r, c))
+                if cell_data["revealed"] and (r, c) not in self._constrained:
+                    self._constrained.add((r, c))
+                    self._add_revealed_constraints(r, c)
+            self._pending = None
+            self._rescan = False
+        self._count("constraints", len(self._constrained) + len(self._flagged))
+        self._count("variables", self.rows * self.cols)
 
-                if cell_data["revealed"] and not cell_data["mine"]:
-                    solver.add(Not(cells[r][c]))  # Revealed non-mine cells cannot be mines
+    def _identify_mines_incremental(self):
+        """
+        Same as identify_mines, but reuses one Z3 solver across calls.
 
-        # Solve the constraints
-        if solver.check() == sat:
-            model = solver.model()
-            suspected_mines = [(r, c) for r in range(self.rows) for c in range(self.cols) if is_true(model.evaluate(cells[r][c]))]
+        Revealed cells never change back, so their constraints are added to the
+        solver permanently. Flags can be removed by the player, so they are
+        passed as assumptions to check() instead of being asserted.
+
+        Returns:
+            list of tuples: Coordinates of cells suspected to contain mines.
+        """
+        self._sync_incremental()
+
+        assumptions = [self._cells[r][c] for r, c in self._flagged]
+        if self._check(self._solver, *assumptions) == z3.sat:
+            # Only the variables that occur in constraints are assigned by the model,
+            # so walk those instead of evaluating every cell of the board
+            with self._phase("model"):
+                model = self._solver.model()
+                suspected_mines = []
+                for decl in model.decls():
+                    # Encodings may add auxiliary variables, only the cell variables matter
+                    if decl.name().startswith("cell_") and z3.is_true(model[decl]):
+                        _, r, c = decl.name().split("_")
+                        if (int(r), int(c)) not in self._constrained:
+                            suspected_mines.append((int(r), int(c)))
             return suspected_mines
         return []
-    
+
+    def _identify_mines_frontier(self):
+        """
+        Same as identify_mines, but only encodes the frontier.
+
+        Each connected component of the frontier gets its own small Z3 problem.
+        Interior cells carry no constraint, so no model would ever need them to
+        be mines and they are left out entirely.
+
+        Returns:
+            list of tuples: Coordinates of cells suspected to contain mines.
+        """
+        with self._phase("frontier"):
+            self.frontier = Frontier(self.grid)
+        self._count_frontier(self.frontier)
+        suspected_mines = []
+        for component in self.frontier.components:
+            solver, cells = self._build_component_solver(component)
+            if self._check(solver) != z3.sat:
+                return []  # The flags contradict the numbers, same as the full model
+            with self._phase("model"):
+                model = solver.model()
+                suspected_mines.extend(cell for cell, var in cells.items() if z3.is_true(model.evaluate(var)))
+        return suspected_mines
+
+    def _build_component_solver(self, component):
+        """
+        Encodes one frontier component as its own Z3 problem.
+
+        Args:
+            component (Component): Cells and constraints of the component.
+
+        Returns:
+            tuple: The Solver and a dict mapping cell coordinates to Bool variables.
+        """
+        with self._phase("build"):
+            solver = self.encoding.solver()
+            cells = {cell: z3.Bool(f"cell_{cell[0]}_{cell[1]}") for cell in component.cells}
+            for scope, count in component.constraints:
+                solver.add(*self.encoding.exactly([cells[cell] for cell in scope], count))
+        self._count("constraints", len(component.constraints))
+        self._count("variables", len(cells))
+        return solver, cells
+
+    def _add_revealed_constraints(self, row, col):
+        """
+        Adds the permanent constraints of a newly revealed cell to the persistent solver.
+
+        Args:
+            row (int): Row index.
+            col (int): Column index.
+        """
+        cell_data = self.grid[row][col]
+        if cell_data["mine"]:
+            return  # Mines are only revealed once the game is lost
+        self._solver.add(z3.Not(self._cells[row][col]))
+        if cell_data["number"] > 0:
+            adjacent_mines = [self._cells[ar][ac] for ar, ac in self._get_adjacent_cells(row, col)]
+            self._solver.add(*self.encoding.exactly(adjacent_mines, cell_data["number"]))
+
     def _get_adjacent_cells(self, row, col):
         """
         Gets the coordinates of adjacent cells for a given cell.
@@ -76,74 +321,350 @@ class AISolver:
             if 0 <= row + dr < self.rows and 0 <= col + dc < self.cols
         ]
 
-    def suggest_moves(self):
+    @_profiled
+    def deduce(self):
         """
-        Suggests the next best move for the player based on AI deductions.
+        Proves which frontier cells are definitely safe and which are definitely mines.
+
+        Deduction runs in tiers, from cheapest to most complete. The single-point
+        rules of Frontier come first; if they find no safe cell, the pairwise
+        rules compare overlapping numbers. Unless the solver is exhaustive, Z3
+        is only used when neither finds a safe cell, and `tier` records which
+        tier produced the result.
+
+        Components whose pattern was solved before are answered by the pattern
+        cache. Z3 is only asked about the remaining cells: one model gives a
+        candidate value for each of them, and a cell is proven when assuming the
+        opposite value is unsat. All checks run against the same solver through
+        assumptions, and every new model discards the candidates it contradicts.
+        Cells that are neither proven safe nor proven mines are undetermined.
 
         Returns:
-            dict: A dictionary with two keys:
-                "safe_cells": List of safe cell coordinates to reveal.
-                "mine_cells": List of mine cell coordinates to flag.
+            tuple: (safe, mines) sets of coordinates proven safe and proven mines.
         """
-        suspected_mines = self.identify_mines()
-        
-        safe_cells = []
-        mine_cells = []
+        with self._phase("frontier"):
+            frontier = Frontier(self.grid)
+            safe, mines = frontier.apply_local_rules()
+        self.tier = "local"
+        if frontier.cells and (not safe or self.exhaustive):
+            with self._phase("rules"):
+                safe, mines = frontier.apply_pairwise_rules(self._checkpoint)
+            self.tier = "pairwise"
+        self.frontier = frontier
+        self._count_frontier(frontier)
+        if not frontier.consistent:
+            return set(), set()  # The flags contradict the numbers, nothing can be proven
+        if not frontier.cells or (safe and not self.exhaustive):
+            return set(safe), set(mines)
+        self.tier = "cache"
 
-        for r in range(self.rows):
-            for c in range(self.cols):
-                if not self.grid[r][c]["revealed"]:
-                    if (r, c) in suspected_mines:
-                        mine_cells.append((r, c))
-                    else:
-                        safe_cells.append((r, c))
+        safe, mines = set(safe), set(mines)
+        unsolved = []
+        for component in frontier.components:
+            cached = self.pattern_cache.get(component, "deduction")
+            if cached is None:
+                unsolved.append(component)
+            else:
+                safe.update(cached[0])
+                mines.update(cached[1])
+        self._count("pattern_hits", len(frontier.components) - len(unsolved))
+        if unsolved:
+            self.tier = "z3"
 
-        return {"safe_cells": safe_cells, "mine_cells": mine_cells}
-    
-    
-    
+        if self.mode == "frontier":
+            for component in unsolved:
+                start = time.perf_counter()
+                solver, variables = self._build_component_solver(component)
+                result = self._entailed(solver, variables, [])
+                if result is None:
+                    return set(), set()
+                self.pattern_cache.put(component, "deduction", result, time.perf_counter() - start)
+                safe.update(result[0])
+                mines.update(result[1])
+            return safe, mines
+        if not unsolved:
+            return safe, mines
+
+        start = time.perf_counter()
+        if self.mode == "incremental":
+            self._sync_incremental()
+            solver, cells = self._solver, self._cells
+            assumptions = [cells[r][c] for r, c in self._flagged]
+        else:
+            solver, cells = self._build_full_solver()
+            assumptions = []
+        known = [(cell, False) for cell in safe] + [(cell, True) for cell in mines]
+        assumptions += [cells[r][c] if is_mine else z3.Not(cells[r][c]) for (r, c), is_mine in known]
+        variables = {(r, c): cells[r][c] for component in unsolved for r, c in component.cells}
+        result = self._entailed(solver, variables, assumptions)
+        if result is None:
+            return set(), set()
+        # Components are independent, so the result splits into one entry per component
+        cost = (time.perf_counter() - start) / len(unsolved)
+        for component in unsolved:
+            cells = set(component.cells)
+            self.pattern_cache.put(component, "deduction", (result[0] & cells, result[1] & cells), cost)
+        safe.update(result[0])
+        mines.update(result[1])
+        return safe, mines
+
+    def interrupt(self):
+        """
+        Stops the solve running in another thread as soon as possible.
+
+        The solve is stopped cooperatively: the Z3 check in flight is left to
+        finish (single checks on a frontier take milliseconds) and the next
+        check, or the next step of the pure-Python rules and solution counts,
+        raises SolverInterrupted. Interrupting the Z3
+        context itself is avoided, because a cancel that lands between two
+        checks leaves the context in an error state. Call clear_interrupt()
+        before starting a new solve.
         """
-        Calculate Accuracy does not interact with the AI sat solvers ability to predict the location of the mines
-        rather it takes mine predicition data and the actual location of the mines and checks every time the accuracy of the data and puts that into a file
-        
+        self._interrupted = True
+
+    def clear_interrupt(self):
         """
-    def calculate_accuracy(self, actual_mines, predicted_mines):
+        Allows solving again after interrupt().
         """
-        Calculate the accuracy of the AI's mine predictions.
+        self._interrupted = False
+
+    def _checkpoint(self):
+        # Called between the steps of long loops, including those of Frontier, to honour interrupt()
+        if self._interrupted:
+            raise SolverInterrupted()
+
+    def _phase(self, name):
+        # Context manager timing a phase, a shared no-op one when profiling is off
+        return _NO_PROFILE if self.profiler is None else self.profiler.phase(name)
+
+    def _count(self, name, value=1):
+        if self.profiler is not None:
+            self.profiler.count(name, value)
+
+    def _count_frontier(self, frontier):
+        # Sizes of the frontier a call works on
+        if self.profiler is not None:
+            self.profiler.count("frontier_cells", len(frontier.cells))
+            self.profiler.count("components", len(frontier.components))
+
+    def _check(self, solver, *assumptions):
+        """
+        Runs solver.check() and adds its duration to z3_time.
+
+        Returns:
+            CheckSatResult: sat, unsat or unknown.
+        """
+        self._checkpoint()
+        with self._phase("check"):
+            start = time.perf_counter()
+            result = solver.check(*assumptions)
+            self.z3_time += time.perf_counter() - start
+        if self.profiler is not None:
+            self.profiler.count("checks")
+            self.profiler.z3_statistics(solver)
+        self._checkpoint()
+        return result
+
+    def _entailed(self, solver, variables, assumptions):
+        """
+        Finds the variables whose value is the same in every model.
 
         Args:
-            actual_mines (list of tuples): List of actual mine locations.
-            predicted_mines (list of tuples): List of predicted mine locations.
-        """
-        true_positives = len(set(actual_mines).intersection(predicted_mines))
-        false_positives = len(set(predicted_mines) - set(actual_mines))
-        false_negatives = len(set(actual_mines) - set(predicted_mines))
-
-        # Update the running totals
-        self.true_positives += true_positives
-        self.false_positives += false_positives
-        self.false_negatives += false_negatives
-        self.total_predictions += len(predicted_mines)
-
-        # Calculate the accuracy
-        if self.total_predictions > 0:
-            accuracy = self.true_positives / self.total_predictions
-        else:
-            accuracy = 0.0
+            solver (Solver): Solver holding the constraints.
+            variables (dict): Maps cell coordinates to their Bool variable.
+            assumptions (list): Extra facts passed to every check().
+
+        Returns:
+            tuple: (safe, mines) sets of coordinates, or None if unsat.
+        """
+        if self._check(solver, *assumptions) != z3.sat:
+            return None
+        with self._phase("model"):
+            model = solver.model()
+            candidates = {cell: z3.is_true(model.eval(var, model_completion=True)) for cell, var in variables.items()}
+
+        safe, mines = set(), set()
+        while candidates:
+            cell, is_mine = candidates.popitem()
+            var = variables[cell]
+            if self._check(solver, *assumptions, z3.Not(var) if is_mine else var) == z3.unsat:
+                (mines if is_mine else safe).add(cell)
+                continue
+            # The counter-model may also flip other candidates, which rules them out too
+            with self._phase("model"):
+                model = solver.model()
+                for other in [other for other, value in candidates.items()
+                              if z3.is_true(model.eval(variables[other], model_completion=True)) != value]:
+                    del candidates[other]
+        return safe, mines
+
+    @_profiled
+    def mine_probabilities(self):
+        """
+        Computes the exact probability that each unrevealed cell holds a mine.
+
+        The solutions of every frontier component are counted per number of
+        mines. A combination of component solutions using K mines leaves the
+        other mines to the interior cells, which can hold them in
+        C(interior, remaining - K) ways, so every combination is weighted by that
+        binomial. Component counts go through the pattern cache, so patterns
+        that repeat between moves or games are only counted once.
 
-        return accuracy
+        Returns:
+            dict: Maps the coordinates of every unrevealed cell to its mine probability.
+        """
+        if self.num_mines is None:
+            raise ValueError("mine_probabilities() needs the total number of mines")
+
+        with self._phase("frontier"):
+            frontier = Frontier(self.grid)
+            safe, mines = frontier.apply_local_rules()
+        self._count_frontier(frontier)
+        probabilities = {(int(r), int(c)): 1.0 for r, c in zip(*frontier.board.flagged.nonzero())}
+        if not frontier.consistent:
+            return probabilities
+        probabilities.update((cell, 0.0) for cell in safe)
+        probabilities.update((cell, 1.0) for cell in mines)
+
+        distributions = []
+        with self._phase("count"):
+            for component in frontier.components:
+                self._checkpoint()
+                counted = self.pattern_cache.get(component, "counts")
+                if counted is None:
+                    start = time.perf_counter()
+                    counted = component.count_solutions(self._checkpoint)
+                    self.pattern_cache.put(component, "counts", counted, time.perf_counter() - start)
+                    self._count("counted_components")
+                distributions.append(counted)
+
+        with self._phase("combine"):
+            return self._combine(frontier, probabilities, distributions, len(mines))
 
-    def save_accuracy_to_file(self, filename="accuracy_data.txt"):
+    def _combine(self, frontier, probabilities, distributions, local_mines):
         """
-        Save the accumulated accuracy to a file.
-        This method will calculate the average accuracy up to the current point in the game.
+        Turns the solution counts of the components into probabilities.
+
+        Args:
+            frontier (Frontier): The frontier the counts belong to.
+            probabilities (dict): Probabilities already known, completed in place.
+            distributions (list of tuple): count_solutions() of every component.
+            local_mines (int): Mines proven by the local rules, not in any component.
+
+        Returns:
+            dict: probabilities, completed.
         """
-        # Calculate the accuracy as a running average
-        if self.total_predictions > 0:
-            accuracy = self.true_positives / self.total_predictions
+        interior = frontier.interior_count
+        remaining = self.num_mines - frontier.flagged_count - frontier.revealed_mine_count - local_mines
+
+        # Total frontier solutions per mine count, with and without each component
+        prefix = [[1]]
+        for counts, _ in distributions:
+            prefix.append(self._convolve(prefix[-1], counts))
+        suffix = [[1]]
+        for counts, _ in reversed(distributions):
+            suffix.append(self._convolve(suffix[-1], counts))
+        suffix.reverse()
+        totals = prefix[-1]
+
+        # Relative number of ways the interior can take the leftover mines
+        log_ways = [
+            self._log_comb(interior, remaining - k) if 0 <= remaining - k <= interior else None
+            for k in range(len(totals))
+        ]
+        feasible = [value for value in log_ways if value is not None]
+        if feasible and any(totals[k] and log_ways[k] is not None for k in range(len(totals))):
+            base = max(feasible)
+            weights = [0.0 if value is None else math.exp(value - base) for value in log_ways]
+            global_count = True
         else:
-            accuracy = 0.0
+            # The flags do not add up with the mine count, drop the global constraint
+            weights = [1.0] * len(totals)
+            global_count = False
+        norm = sum(float(total) * weight for total, weight in zip(totals, weights))
+        if norm == 0:
+            return probabilities
+
+        for i, (component, (counts, tallies)) in enumerate(zip(frontier.components, distributions)):
+            self._checkpoint()
+            others = self._convolve(prefix[i], suffix[i + 1])
+            # Weight of a component solution with k mines, summed over the other components
+            k_weights = [
+                sum(float(other) * weights[k + j] for j, other in enumerate(others))
+                for k in range(len(counts))
+            ]
+            for index, cell in enumerate(component.cells):
+                mined = sum(float(tallies[k][index]) * k_weights[k] for k in range(len(counts)) if tallies[k][index])
+                probabilities[cell] = mined / norm
 
-        # Open the file and append the accuracy data
-        with open(filename, "a") as file:
-            file.write(f"Accuracy Per Update: {accuracy:.4f}\n")
\ No newline at end of file
+        if interior:
+            if not global_count:
+                interior_probability = min(1.0, max(0.0, remaining / interior))
+            else:
+                interior_probability = sum(
+                    float(total) * weight * (remaining - k) / interior
+                    for k, (total, weight) in enumerate(zip(totals, weights))
+                    if weight
+                ) / norm
+            for cell in frontier.interior_cells():
+                probabilities[cell] = interior_probability
+        return probabilities
+
+    @staticmethod
+    def _convolve(a, b):
+        """
+        Multiplies two polynomials given as coefficient lists.
+
+        Args:
+            a (list of int): Solutions per mine count.
+            b (list of int): Solutions per mine count.
+
+        Returns:
+            list of int: Solutions per mine count of both together.
+        """
+        result = [0] * (len(a) + len(b) - 1)
+        for i, x in enumerate(a):
+            if x:
+                for j, y in enumerate(b):
+                    result[i + j] += x * y
+        return result
+
+    @staticmethod
+    def _log_comb(n, k):
+        """
+        Natural logarithm of the binomial coefficient C(n, k).
+        """
+        return math.lgamma(n + 1) - math.lgamma(k + 1) - math.lgamma(n - k + 1)
+
+    @_profiled
+    def suggest_moves(self):
+        """
+        Suggests the next best move for the player based on AI deductions.
+
+        Only cells that are proven safe or proven mines are suggested, cells the
+        revealed numbers do not decide are left out of both lists. When nothing
+        is proven safe and the mine count is known, the unrevealed cell with the
+        lowest mine probability is offered as a guess, and the probabilities
+        that guess came from are kept in `probabilities`.
+
+        Returns:
+            dict: A dictionary with four keys:
+                "safe_cells": List of safe cell coordinates to reveal.
+                "mine_cells": List of mine cell coordinates to flag.
+                "best_guess": Lowest-risk cell to reveal, or None if not needed.
+                "tier": Deduction tier that produced the cells, see deduce().
+        """
+        self.probabilities = None
+        safe, mines = self.deduce()
+        best_guess = None
+        if not safe and self.num_mines is not None:
+            probabilities = self.probabilities = self.mine_probabilities()
+            with self._phase("select"):
+                flagged = Board.of(self.grid).flagged
+                candidates = [
+                    (probability, cell) for cell, probability in probabilities.items()
+                    if not flagged[cell]
+                ]
+                if candidates:
+                    best_guess = min(candidates)[1]
+        return {"safe_cells": sorted(safe), "mine_cells": sorted(mines), "best_guess": best_guess, "tier": self.tier}
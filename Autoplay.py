@@ -0,0 +1,190 @@
+import argparse
+import random
+import time
+
+from AISolver import AISolver
+from Board import Board, REVEALED, FLAGGED
+from Profiler import percentile
+from Replay import FLAG, REVEAL
+
+
+class Autoplay:
+    def __init__(self, board, num_mines=None, mode="frontier", pattern_cache=None):
+        """
+        Lets the AI play a board, one batch of moves per solve.
+
+        Every step asks the solver once, flags every proven mine and reveals
+        every proven safe cell of the answer together. Only when nothing is
+        proven safe is a single cell, the one least likely to be a mine,
+        revealed as a guess. A game is therefore played in as many solves as
+        it takes batches, rather than one solve per revealed cell.
+
+        Args:
+            board (Board): The board, played in place.
+            num_mines (int): Total number of mines, needed to guess when stuck.
+            mode (str): AISolver mode, or None to build no solver and only play
+                the suggestions passed to apply(), as the game does with those
+                of its SolverWorker.
+            pattern_cache (PatternCache): Optional cache shared with other solvers.
+        """
+        self.board = board
+        self.solver = None
+        if mode is not None:
+            self.solver = AISolver(board, mode=mode, num_mines=num_mines, pattern_cache=pattern_cache)
+        self.moves = 0  # Reveals and flags played
+        self.solves = 0
+        self.guesses = 0
+        self.solve_time = 0.0  # Seconds spent in the solver
+        self.lost = False
+        self.stuck = False  # Nothing proven and no guess possible without the mine count
+        self.changed = []  # Cells revealed or flagged by the last step
+
+    @property
+    def done(self):
+        return self.lost or self.stuck or self.board.is_won()
+
+    def step(self):
+        """
+        Solves once and plays every move the answer allows.
+
+        Returns:
+            list of tuple: The (action, row, col) moves played, with the actions
+                of Replay. Empty once the game is over.
+        """
+        if self.solver is None:
+            raise ValueError("step() needs a solver, this Autoplay was built with mode=None")
+        if self.done:
+            return []
+        start = time.perf_counter()
+        suggestion = self.solver.suggest_moves()
+        self.solve_time += time.perf_counter() - start
+        return self.apply(suggestion)
+
+    def apply(self, suggestion):
+        """
+        Plays every move of a suggestion as one batch.
+
+        The suggestion can come from another solver of the same board, such as
+        a SolverWorker, as long as it describes the board's current state.
+
+        Args:
+            suggestion (dict): Output of AISolver.suggest_moves().
+
+        Returns:
+            list of tuple: The (action, row, col) moves played, as in step().
+        """
+        if self.done:
+            return []
+        board = self.board
+        self.solves += 1
+        played = [(FLAG, r, c) for r, c in suggestion["mine_cells"] if not board.state[r, c] & FLAGGED]
+        self.changed = []
+        for _, r, c in played:
+            board.set_flagged(r, c)
+            self.changed.append((r, c))
+        cells = suggestion["safe_cells"]
+        if not cells and suggestion["best_guess"] is not None:
+            cells = [suggestion["best_guess"]]
+            self.guesses += 1
+        for r, c in cells:
+            if board.state[r, c] & REVEALED:
+                continue  # Opened by the flood fill of an earlier cell of the batch
+            played.append((REVEAL, r, c))
+            if board.mines[r, c]:
+                self.lost = True  # Only a guess can hit a mine
+                break
+            self.changed += board.reveal(r, c)
+        if not played:
+            self.stuck = True
+        if self.solver is not None:
+            self.solver.update(self.changed)
+        self.moves += len(played)
+        return played
+
+    def play(self, first_click=None):
+        """
+        Plays until the game is won, lost or stuck.
+
+        Args:
+            first_click (tuple): Cell to reveal before the first solve, for example
+                the one the board was made safe around.
+
+        Returns:
+            dict: "won", "moves", "solves", "guesses", "duration" (seconds of the
+                whole game) and "solve_time" (seconds in the solver).
+        """
+        if self.solver is None:
+            raise ValueError("play() needs a solver, this Autoplay was built with mode=None")
+        start = time.perf_counter()
+        if first_click is not None:
+            self.solver.update(self.board.reveal(*first_click))
+            self.moves += 1
+        while self.step():
+            pass
+        return {
+            "won": self.board.is_won(),
+            "moves": self.moves,
+            "solves": self.solves,
+            "guesses": self.guesses,
+            "duration": time.perf_counter() - start,
+            "solve_time": self.solve_time,
+        }
+
+
+def benchmark(rows, cols, num_mines, seeds, mode="frontier"):
+    """
+    Autoplays one game per seed, the first click in the middle of the board made safe as in the game.
+
+    Returns:
+        dict: Win rate, moves per second over all games, solves and moves per
+            game, and the time to clear a board in milliseconds over the games won.
+    """
+    from PatternCache import PatternCache
+
+    pattern_cache = PatternCache()
+    results = []
+    for seed in seeds:
+        first_click = (rows // 2, cols // 2)
+        board = Board.create(rows, cols, num_mines, rng=random.Random(seed), safe_cell=first_click)
+        results.append(Autoplay(board, num_mines, mode, pattern_cache).play(first_click))
+
+    games = len(results)
+    moves = sum(result["moves"] for result in results)
+    duration = sum(result["duration"] for result in results)
+    clear_times = sorted(result["duration"] for result in results if result["won"])
+    return {
+        "games": games,
+        "win_rate": len(clear_times) / games if games else 0.0,
+        "moves_per_s": moves / duration if duration else 0.0,
+        "moves_per_game": moves / games if games else 0.0,
+        "solves_per_game": sum(result["solves"] for result in results) / games if games else 0.0,
+        "clear_mean_ms": 1000 * sum(clear_times) / len(clear_times) if clear_times else 0.0,
+        "clear_p50_ms": 1000 * percentile(clear_times, 50),
+        "clear_p95_ms": 1000 * percentile(clear_times, 95),
+    }
+
+
+def main():
+    from Game import Game
+    from Simulator import derive_seed
+
+    parser = argparse.ArgumentParser(description="Autoplay headless games and measure move throughput.")
+    parser.add_argument("--difficulty", choices=sorted(Game.DIFFICULTIES), action="append",
+                        help="Difficulty to play, can be repeated (default: all)")
+    parser.add_argument("--games", type=int, default=100, help="Games per difficulty")
+    parser.add_argument("--seed", type=int, default=0, help="Master seed, every game derives its own seed from it")
+    parser.add_argument("--mode", choices=AISolver.MODES, default="frontier", help="AISolver mode")
+    args = parser.parse_args()
+
+    for difficulty in args.difficulty or list(Game.DIFFICULTIES):
+        rows, cols, num_mines = Game.DIFFICULTIES[difficulty]
+        summary = benchmark(rows, cols, num_mines, [derive_seed(args.seed, index) for index in range(args.games)],
+                            args.mode)
+        print(f"{difficulty}: win rate {summary['win_rate']:.3f}, {summary['moves_per_s']:.0f} moves/s, "
+              f"{summary['moves_per_game']:.1f} moves in {summary['solves_per_game']:.1f} solves per game, "
+              f"time to clear mean/p50/p95 {summary['clear_mean_ms']:.2f}/{summary['clear_p50_ms']:.2f}/"
+              f"{summary['clear_p95_ms']:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
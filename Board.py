@@ -0,0 +1,506 @@
+import random
+
+import numpy as np
+
+# Bits of Board.state
+REVEALED = 1
+FLAGGED = 2
+
+
+class Board:
+    def __init__(self, mines):
+        """
+        Game board stored as NumPy arrays instead of one dict per cell.
+
+        `mines` is a bool array, `state` an int8 array of REVEALED/FLAGGED bits
+        and `numbers` a uint8 array of adjacent mine counts. Indexing the board
+        like the old grid (`board[r][c]["revealed"]`) still works through
+        lightweight views, so existing call sites and AISolver(grid) keep
+        working, while hot paths use the arrays directly.
+
+        Args:
+            mines (numpy.ndarray): 2D bool array, True where a mine is.
+        """
+        self.mines = np.asarray(mines, dtype=bool)
+        self.rows, self.cols = self.mines.shape
+        self.state = np.zeros(self.mines.shape, dtype=np.int8)
+        self.numbers = self.neighbour_counts(self.mines)
+        self.numbers[self.mines] = 0  # Mine cells carry no number
+        self.num_mines = int(self.mines.sum())
+        self.flagged_count = 0
+        self.safe_revealed = 0  # Revealed cells without a mine, for O(1) win detection
+        self.version = 0  # Bumped on every change, so observers can skip work when nothing changed
+        self._mine_cells = None
+
+    @classmethod
+    def create(cls, rows, cols, num_mines=None, rng=None, density=None, safe_cell=None):
+        """
+        Builds a board with randomly placed mines.
+
+        The mines are drawn by NumPy in one call and the numbers come from a
+        vectorized neighbour count, so boards of millions of cells are built in
+        a fraction of a second.
+
+        Args:
+            rows (int): Number of rows.
+            cols (int): Number of columns.
+            num_mines (int): Number of mines to place, or None to use density.
+            rng (random.Random or numpy.random.Generator): Optional source of
+                randomness, defaults to the random module. A random.Random seeds
+                the NumPy generator, so the board only depends on its state.
+            density (float): Fraction of the cells holding a mine, used when
+                num_mines is None.
+            safe_cell (tuple): Cell kept free of mines, along with its neighbours
+                when the board has room for that, so a first click there is safe.
+
+        Returns:
+            Board: The new board.
+        """
+        if num_mines is None:
+            if density is None:
+                raise ValueError("create() needs num_mines or density")
+            num_mines = int(round(density * rows * cols))
+        excluded = np.zeros((rows, cols), dtype=bool)
+        if safe_cell is not None:
+            excluded = cls._safe_zone(rows, cols, safe_cell, num_mines)
+        mines = np.zeros(rows * cols, dtype=bool)
+        mines[cls._draw(np.flatnonzero(~excluded), num_mines, rng)] = True
+        return cls(mines.reshape(rows, cols))
+
+    @classmethod
+    def create_no_guess(cls, rows, cols, num_mines=None, rng=None, density=None, first_click=None, attempts=200,
+                        time_limit=None):
+        """
+        Builds a board that can be cleared from first_click by deduction alone.
+
+        Boards are drawn with a safe first click and played by AISolver, which
+        reveals every proven safe cell and flags every proven mine, until one
+        is cleared without ever needing a guess.
+
+        Args:
+            rows, cols, num_mines, rng, density: As in create().
+            first_click (tuple): Cell the player starts from, defaults to the centre.
+            attempts (int): Boards to try before giving up.
+            time_limit (float): Seconds to search before giving up, no limit by default.
+
+        Returns:
+            Board: The new board, nothing revealed yet.
+
+        Raises:
+            ValueError: If no board solvable without guessing was found in time.
+        """
+        import time
+
+        from PatternCache import PatternCache
+
+        first_click = first_click or (rows // 2, cols // 2)
+        deadline = None if time_limit is None else time.perf_counter() + time_limit
+        pattern_cache = PatternCache()  # Patterns recur from one attempt to the next
+        for attempt in range(attempts):
+            if deadline is not None and time.perf_counter() > deadline:
+                raise ValueError(f"No board without guesses found in {time_limit} s ({attempt} attempts)")
+            board = cls.create(rows, cols, num_mines, rng, density, safe_cell=first_click)
+            if board.solvable_from(*first_click, pattern_cache=pattern_cache, deadline=deadline):
+                return board
+        raise ValueError(f"No board without guesses found in {attempts} attempts")
+
+    def solvable_from(self, row, col, pattern_cache=None, deadline=None):
+        """
+        Checks whether the board can be cleared from a first click by deduction alone.
+
+        The board itself is left untouched, a copy is played.
+
+        Args:
+            row (int): Row of the first click.
+            col (int): Column of the first click.
+            pattern_cache (PatternCache): Optional cache shared between checks.
+            deadline (float): time.perf_counter() value after which the check
+                gives up and reports the board as not solvable.
+
+        Returns:
+            bool: True if the solver never has to guess.
+        """
+        import time
+
+        from AISolver import AISolver  # AISolver is built on Board
+
+        board = self.copy()
+        if board.mines[row, col]:
+            return False
+        board.reveal(row, col)
+        solver = AISolver(board, mode="frontier", pattern_cache=pattern_cache)
+        while not board.is_won():
+            if deadline is not None and time.perf_counter() > deadline:
+                return False
+            safe, mines = solver.deduce()
+            if not safe:
+                return False
+            for r, c in mines:
+                board.set_flagged(r, c)
+            for r, c in safe:
+                board.reveal(r, c)
+        return True
+
+    def clear_around(self, row, col, rng=None):
+        """
+        Moves the mines off a cell and its neighbours, before the first click lands there.
+
+        Args:
+            row (int): Row of the first click.
+            col (int): Column of the first click.
+            rng (random.Random or numpy.random.Generator): As in create().
+        """
+        zone = self._safe_zone(self.rows, self.cols, (row, col), self.num_mines)
+        moved = int((self.mines & zone).sum())
+        if not moved:
+            return
+        mines = self.mines.copy()
+        mines[zone] = False
+        free = np.flatnonzero(~mines & ~zone)
+        mines.flat[self._draw(free, moved, rng)] = True
+        self.reset_mines(mines)
+
+    def reset_mines(self, mines):
+        """
+        Replaces the mine layout of a board, keeping the same object so every
+        reference to it sees the new layout. Only meant for boards nobody has
+        played yet.
+
+        Args:
+            mines (numpy.ndarray): 2D bool array of the board's shape.
+        """
+        self.mines = np.asarray(mines, dtype=bool).copy()
+        self.numbers = self.neighbour_counts(self.mines)
+        self.numbers[self.mines] = 0
+        self.num_mines = int(self.mines.sum())
+        self.safe_revealed = int((self.revealed & ~self.mines).sum())
+        self._mine_cells = None
+        self.version += 1
+
+    @staticmethod
+    def _safe_zone(rows, cols, cell, num_mines):
+        # The cell and its neighbours, or only the cell if the mines would not fit around them
+        row, col = cell
+        zone = np.zeros((rows, cols), dtype=bool)
+        zone[max(row - 1, 0):row + 2, max(col - 1, 0):col + 2] = True
+        if rows * cols - int(zone.sum()) < num_mines:
+            zone[:] = False
+            zone[row, col] = True
+        return zone
+
+    @staticmethod
+    def _draw(candidates, count, rng):
+        # Picks count distinct entries of candidates at random, in one vectorized call
+        if count > len(candidates):
+            raise ValueError(f"Cannot place {count} mines in {len(candidates)} free cells")
+        if not isinstance(rng, np.random.Generator):
+            rng = np.random.default_rng((rng or random).getrandbits(64))
+        return candidates[rng.choice(len(candidates), count, replace=False)]
+
+    @classmethod
+    def from_grid(cls, grid):
+        """
+        Converts an old list-of-dicts grid into a Board snapshot.
+
+        Args:
+            grid (list of list of dict): A 2D list of cells in the game grid.
+
+        Returns:
+            Board: A board with the same mines, numbers, reveals and flags.
+        """
+        board = cls(np.array([[cell["mine"] for cell in row] for row in grid], dtype=bool))
+        board.numbers = np.array([[cell["number"] for cell in row] for row in grid], dtype=np.uint8)
+        board.state = np.array(
+            [[REVEALED * bool(cell["revealed"]) | FLAGGED * bool(cell["flagged"]) for cell in row] for row in grid],
+            dtype=np.int8,
+        )
+        board.flagged_count = int(board.flagged.sum())
+        board.safe_revealed = int((board.revealed & ~board.mines).sum())
+        return board
+
+    @classmethod
+    def from_arrays(cls, mines, numbers, state):
+        """
+        Builds a board from existing arrays, for example a window cut out of a larger board.
+
+        The numbers are taken as given rather than recounted, since on a window
+        they also depend on mines outside it.
+
+        Args:
+            mines (numpy.ndarray): 2D bool array.
+            numbers (numpy.ndarray): 2D array of adjacent mine counts.
+            state (numpy.ndarray): 2D array of REVEALED/FLAGGED bits.
+
+        Returns:
+            Board: The board, owning copies of the arrays.
+        """
+        board = cls(mines)
+        board.numbers = np.array(numbers, dtype=np.uint8)
+        board.state = np.array(state, dtype=np.int8)
+        board.flagged_count = int(board.flagged.sum())
+        board.safe_revealed = int((board.revealed & ~board.mines).sum())
+        return board
+
+    def copy(self):
+        """
+        Returns an independent snapshot of the board, for example to hand to another thread.
+        """
+        board = type(self).__new__(type(self))
+        board.__dict__.update(self.__dict__)
+        board.mines = self.mines.copy()
+        board.state = self.state.copy()
+        board.numbers = self.numbers.copy()
+        return board
+
+    @classmethod
+    def of(cls, grid):
+        """
+        Returns grid itself if it is a Board, else a Board snapshot of it.
+        """
+        return grid if isinstance(grid, cls) else cls.from_grid(grid)
+
+    @staticmethod
+    def neighbour_counts(mask):
+        """
+        Counts, for every cell, how many of its eight neighbours are set in mask.
+
+        Args:
+            mask (numpy.ndarray): 2D bool array.
+
+        Returns:
+            numpy.ndarray: 2D uint8 array of the same shape.
+        """
+        rows, cols = mask.shape
+        padded = np.pad(mask.astype(np.uint8), 1)
+        counts = np.zeros((rows, cols), dtype=np.uint8)
+        for dr in (0, 1, 2):
+            for dc in (0, 1, 2):
+                if dr != 1 or dc != 1:
+                    counts += padded[dr:dr + rows, dc:dc + cols]
+        return counts
+
+    @property
+    def revealed(self):
+        return (self.state & REVEALED).astype(bool)
+
+    @property
+    def flagged(self):
+        return (self.state & FLAGGED).astype(bool)
+
+    @property
+    def unknown(self):
+        # Cells that are neither revealed nor flagged
+        return self.state == 0
+
+    def is_won(self):
+        """
+        Checks in O(1) whether every non-mine cell has been revealed.
+        """
+        return self.safe_revealed == self.rows * self.cols - self.num_mines
+
+    def safe_left(self):
+        """
+        Number of non-mine cells that are still hidden.
+        """
+        return self.rows * self.cols - self.num_mines - self.safe_revealed
+
+    def mine_cells(self):
+        """
+        Lists the coordinates of every mine, computed once per board.
+
+        Returns:
+            list of tuples: Coordinates of the mines.
+        """
+        if self._mine_cells is None:
+            self._mine_cells = [(int(r), int(c)) for r, c in np.argwhere(self.mines)]
+        return self._mine_cells
+
+    def frontier_mask(self):
+        """
+        Marks the unknown cells that touch a revealed number.
+
+        Returns:
+            numpy.ndarray: 2D bool array.
+        """
+        return self.unknown & (self.neighbour_counts(self.revealed & ~self.mines) > 0)
+
+    def reveal(self, row, col):
+        """
+        Reveals a cell, and flood-fills outwards from it if it has no adjacent mines.
+
+        The fill is an iterative scanline fill with an explicit stack, so it
+        needs no recursion: every step takes a whole horizontal run of empty
+        cells at once (found with bytearray.find at C speed) and seeds the rows
+        above and below. Once the empty region is known, it is grown by one
+        cell with a vectorized neighbour count to add its numbered border.
+        Neighbours are bounded by the real board size, coordinates off the
+        board are ignored instead of wrapping around, and flagged cells are
+        left alone.
+
+        Args:
+            row (int): Row index.
+            col (int): Column index.
+
+        Returns:
+            list of tuples: Coordinates of the cells revealed by this call.
+        """
+        if not (0 <= row < self.rows and 0 <= col < self.cols) or self.state[row, col]:
+            return []  # Off the board, already revealed or flagged
+        if self.mines[row, col] or self.numbers[row, col]:
+            self.set_revealed(row, col)
+            return [(row, col)]
+
+        rows, cols = self.rows, self.cols
+        # 1 for hidden, unflagged cells with no adjacent mine: the cells the fill spreads through
+        open_cells = bytearray(((self.numbers == 0) & ~self.mines & (self.state == 0)).tobytes())
+        spans = []
+        stack = [(row, col)]
+        while stack:
+            r, c = stack.pop()
+            base = r * cols
+            if not open_cells[base + c]:
+                continue
+            # Widen to the whole run of open cells on this row, then close it
+            left = open_cells.rfind(0, base, base + c) + 1 or base
+            right = open_cells.find(0, base + c, base + cols)
+            if right == -1:
+                right = base + cols
+            open_cells[left:right] = bytes(right - left)
+            spans.append((r, left - base, right - base))
+
+            # Seed every open run of the rows above and below that touches this one, diagonals included
+            lo, hi = max(left - base - 1, 0), min(right - base + 1, cols)
+            for nr in (r - 1, r + 1):
+                if 0 <= nr < rows:
+                    nbase = nr * cols
+                    start = open_cells.find(1, nbase + lo, nbase + hi)
+                    while start != -1:
+                        stack.append((nr, start - nbase))
+                        end = open_cells.find(0, start, nbase + hi)
+                        if end == -1:
+                            break
+                        start = open_cells.find(1, end, nbase + hi)
+
+        # Grow the empty region by one cell inside its bounding box to add the numbered border
+        top = max(min(r for r, _, _ in spans) - 1, 0)
+        bottom = min(max(r for r, _, _ in spans) + 2, rows)
+        left = max(min(a for _, a, _ in spans) - 1, 0)
+        right = min(max(b for _, _, b in spans) + 1, cols)
+        empty = np.zeros((bottom - top, right - left), dtype=bool)
+        for r, a, b in spans:
+            empty[r - top, a - left:b - left] = True
+        window = self.state[top:bottom, left:right]
+        new = (empty | (self.neighbour_counts(empty) > 0)) & (window == 0)
+
+        # A cell next to an empty cell has no mine, so everything revealed here is safe
+        window[new] |= REVEALED
+        self.version += 1
+        rs, cs = new.nonzero()
+        self.safe_revealed += len(rs)
+        return list(zip((rs + top).tolist(), (cs + left).tolist()))
+
+    def reveal_mines(self):
+        # Reveals every mine at once, used when the game is lost
+        self.state[self.mines] |= REVEALED
+        self.version += 1
+
+    def set_revealed(self, row, col, value=True):
+        # Sets or clears the revealed bit and keeps the counters in sync
+        if bool(self.state[row, col] & REVEALED) == bool(value):
+            return
+        self.state[row, col] ^= REVEALED
+        self.version += 1
+        if not self.mines[row, col]:
+            self.safe_revealed += 1 if value else -1
+
+    def set_flagged(self, row, col, value=True):
+        # Sets or clears the flagged bit and keeps the counters in sync
+        if bool(self.state[row, col] & FLAGGED) == bool(value):
+            return
+        self.state[row, col] ^= FLAGGED
+        self.version += 1
+        self.flagged_count += 1 if value else -1
+
+    def set_mine(self, row, col, value=True):
+        # Only for compatibility with code that edits cells directly, numbers are not updated
+        if bool(self.mines[row, col]) == bool(value):
+            return
+        if self.state[row, col] & REVEALED:
+            self.safe_revealed += -1 if value else 1
+        self.mines[row, col] = value
+        self.version += 1
+        self.num_mines += 1 if value else -1
+        self._mine_cells = None
+
+    def __len__(self):
+        return self.rows
+
+    def __getitem__(self, row):
+        if not -self.rows <= row < self.rows:
+            raise IndexError("board row out of range")
+        return _RowView(self, row % self.rows)
+
+    def __iter__(self):
+        for row in range(self.rows):
+            yield _RowView(self, row)
+
+
+class _RowView:
+    # One row of a Board, indexable like a list of cells
+    def __init__(self, board, row):
+        self.board = board
+        self.row = row
+
+    def __len__(self):
+        return self.board.cols
+
+    def __getitem__(self, col):
+        if not -self.board.cols <= col < self.board.cols:
+            raise IndexError("board column out of range")
+        return _CellView(self.board, self.row, col % self.board.cols)
+
+    def __iter__(self):
+        for col in range(self.board.cols):
+            yield _CellView(self.board, self.row, col)
+
+
+class _CellView:
+    # One cell of a Board, readable and writable like the old cell dict
+    __slots__ = ("board", "row", "col")
+
+    def __init__(self, board, row, col):
+        self.board = board
+        self.row = row
+        self.col = col
+
+    def __getitem__(self, key):
+        board, r, c = self.board, self.row, self.col
+        if key == "mine":
+            return bool(board.mines[r, c])
+        if key == "revealed":
+            return bool(board.state[r, c] & REVEALED)
+        if key == "flagged":
+            return bool(board.state[r, c] & FLAGGED)
+        if key == "number":
+            return int(board.numbers[r, c])
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        board, r, c = self.board, self.row, self.col
+        if key == "mine":
+            board.set_mine(r, c, value)
+        elif key == "revealed":
+            board.set_revealed(r, c, value)
+        elif key == "flagged":
+            board.set_flagged(r, c, value)
+        elif key == "number":
+            board.numbers[r, c] = value
+            board.version += 1
+        else:
+            raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
@@ -0,0 +1,289 @@
+import zlib
+from collections import OrderedDict, deque
+
+import numpy as np
+
+from Board import Board, REVEALED, FLAGGED
+
+CHUNK_SIZE = 64
+
+
+class _Chunk:
+    # One materialized square of the board
+    __slots__ = ("mines", "numbers", "state")
+
+    def __init__(self, mines, numbers, state):
+        self.mines = mines
+        self.numbers = numbers
+        self.state = state
+
+
+class ChunkedBoard:
+    def __init__(self, seed, density=0.2, chunk_size=CHUNK_SIZE, max_chunks=256, safe_origin=True, max_fill=100000):
+        """
+        Endless board, split in square chunks that only exist once they are used.
+
+        The mines of a chunk are drawn from a generator seeded with the board
+        seed and the chunk coordinates, so any chunk can be rebuilt at any time
+        and only the player's progress (revealed and flagged cells) needs to be
+        kept. Chunks are materialized when a cell in them is revealed, flagged
+        or viewed. At most max_chunks stay materialized; the least recently
+        used ones are evicted, keeping only their state bits packed and
+        zlib-compressed, and chunks that were merely viewed are dropped
+        entirely. Memory therefore grows with the explored area, not with the
+        size of the board, which has none.
+
+        Coordinates are unbounded integers, negative ones included.
+
+        Args:
+            seed (int): Seed of the whole board.
+            density (float): Probability that a cell holds a mine.
+            chunk_size (int): Side of a chunk in cells.
+            max_chunks (int): Chunks kept materialized at once.
+            safe_origin (bool): Keep (0, 0) and its neighbours free of mines, so
+                the game can start there.
+            max_fill (int): Most cells one reveal may open. Below a density of
+                about 0.1 empty regions no longer end, so a flood fill is cut
+                off there and the rest of the region stays hidden.
+        """
+        self.seed = seed
+        self.density = density
+        self.chunk_size = chunk_size
+        self.max_chunks = max_chunks
+        self.safe_origin = safe_origin
+        self.max_fill = max_fill
+        self.revealed_count = 0
+        self.flagged_count = 0
+        self.version = 0
+        self._chunks = OrderedDict()  # (chunk row, chunk col) -> _Chunk, least recently used first
+        self._stored = {}  # (chunk row, chunk col) -> compressed state of an evicted chunk
+
+    def is_mine(self, row, col):
+        chunk, r, c = self._locate(row, col)
+        return bool(chunk.mines[r, c])
+
+    def number(self, row, col):
+        chunk, r, c = self._locate(row, col)
+        return int(chunk.numbers[r, c])
+
+    def is_revealed(self, row, col):
+        chunk, r, c = self._locate(row, col)
+        return bool(chunk.state[r, c] & REVEALED)
+
+    def is_flagged(self, row, col):
+        chunk, r, c = self._locate(row, col)
+        return bool(chunk.state[r, c] & FLAGGED)
+
+    def set_flagged(self, row, col, value=True):
+        # Sets or clears the flag of a hidden cell
+        chunk, r, c = self._locate(row, col)
+        if chunk.state[r, c] & REVEALED or bool(chunk.state[r, c] & FLAGGED) == bool(value):
+            return
+        chunk.state[r, c] ^= FLAGGED
+        self.flagged_count += 1 if value else -1
+        self.version += 1
+
+    def reveal(self, row, col):
+        """
+        Reveals a cell, and flood-fills outwards from it across chunks if it has no adjacent mines.
+
+        Args:
+            row (int): Row index.
+            col (int): Column index.
+
+        Returns:
+            list of tuples: Coordinates of the cells revealed by this call.
+        """
+        chunk, r, c = self._locate(row, col)
+        if chunk.state[r, c]:
+            return []  # Already revealed or flagged
+        revealed = []
+        queue = deque([(row, col)])
+        while queue and len(revealed) < self.max_fill:
+            cell = queue.popleft()
+            chunk, r, c = self._locate(*cell)
+            if chunk.state[r, c]:
+                continue
+            chunk.state[r, c] |= REVEALED
+            revealed.append(cell)
+            if chunk.mines[r, c] or chunk.numbers[r, c]:
+                continue
+            for dr in (-1, 0, 1):
+                for dc in (-1, 0, 1):
+                    if dr or dc:
+                        queue.append((cell[0] + dr, cell[1] + dc))
+        self.revealed_count += len(revealed)
+        self.version += 1
+        return revealed
+
+    def window(self, top, left, rows, cols, margin=1):
+        """
+        Copies a rectangle of the board into a Board the solver can work on.
+
+        Numbers on the edge of the rectangle depend on cells outside it. The
+        outer `margin` rings are therefore always handed over as hidden, even
+        where they are revealed: the edge numbers then see unknown neighbours
+        on every side, which loses some information but never leads to a wrong
+        deduction.
+
+        Args:
+            top (int): Row of the top-left cell.
+            left (int): Column of the top-left cell.
+            rows (int): Height of the rectangle.
+            cols (int): Width of the rectangle.
+            margin (int): Rings of cells along the edge handed over as hidden.
+
+        Returns:
+            Board: Snapshot of the rectangle as the player sees it: the real
+                numbers of revealed cells, and no mine on hidden cells.
+        """
+        mines = np.zeros((rows, cols), dtype=bool)
+        numbers = np.zeros((rows, cols), dtype=np.uint8)
+        state = np.zeros((rows, cols), dtype=np.int8)
+        size = self.chunk_size
+        for cy in range(top // size, (top + rows - 1) // size + 1):
+            for cx in range(left // size, (left + cols - 1) // size + 1):
+                chunk = self._chunk(cy, cx)
+                # Overlap of the chunk and the rectangle, in board coordinates
+                r0, r1 = max(top, cy * size), min(top + rows, (cy + 1) * size)
+                c0, c1 = max(left, cx * size), min(left + cols, (cx + 1) * size)
+                target = (slice(r0 - top, r1 - top), slice(c0 - left, c1 - left))
+                source = (slice(r0 - cy * size, r1 - cy * size), slice(c0 - cx * size, c1 - cx * size))
+                mines[target] = chunk.mines[source]
+                numbers[target] = chunk.numbers[source]
+                state[target] = chunk.state[source]
+        if margin:
+            inner = state[margin:-margin, margin:-margin].copy()
+            state[:] = 0
+            state[margin:-margin, margin:-margin] = inner
+        # Only what the player can see is handed over, so the solver cannot read the answers
+        revealed = (state & REVEALED) != 0
+        return Board.from_arrays(mines & revealed, np.where(revealed, numbers, 0), state)
+
+    def deduce(self, top, left, rows, cols, pattern_cache=None):
+        """
+        Runs the solver on the frontier inside a view of the board.
+
+        Args:
+            top, left, rows, cols: The view, as in window().
+            pattern_cache (PatternCache): Optional cache shared between calls.
+
+        Returns:
+            tuple: (safe, mines) sets of board coordinates, hidden cells only.
+        """
+        from AISolver import AISolver  # AISolver is built on Board, which this module also uses
+
+        board = self.window(top - 1, left - 1, rows + 2, cols + 2)
+        safe, mines = AISolver(board, mode="frontier", pattern_cache=pattern_cache).deduce()
+        hidden = board.state == 0
+        return (
+            {(top - 1 + r, left - 1 + c) for r, c in safe if hidden[r, c] and not self._state(top - 1 + r, left - 1 + c)},
+            {(top - 1 + r, left - 1 + c) for r, c in mines if hidden[r, c] and not self._state(top - 1 + r, left - 1 + c)},
+        )
+
+    def memory(self):
+        """
+        Returns:
+            dict: Materialized chunks, evicted chunks and the bytes each kind takes.
+        """
+        live = sum(chunk.mines.nbytes + chunk.numbers.nbytes + chunk.state.nbytes for chunk in self._chunks.values())
+        return {
+            "live_chunks": len(self._chunks),
+            "live_bytes": live,
+            "stored_chunks": len(self._stored),
+            "stored_bytes": sum(len(data) for data in self._stored.values()),
+        }
+
+    def _state(self, row, col):
+        chunk, r, c = self._locate(row, col)
+        return chunk.state[r, c]
+
+    def _locate(self, row, col):
+        # The chunk holding a cell and the cell's position inside it
+        cy, r = divmod(row, self.chunk_size)
+        cx, c = divmod(col, self.chunk_size)
+        return self._chunk(cy, cx), r, c
+
+    def _chunk(self, cy, cx):
+        # Returns a chunk, materializing it and evicting the least recently used one if needed
+        chunk = self._chunks.get((cy, cx))
+        if chunk is not None:
+            self._chunks.move_to_end((cy, cx))
+            return chunk
+
+        size = self.chunk_size
+        # The numbers along the chunk's edge depend on the mines of its eight neighbours
+        around = np.block([[self._mines(cy + dy, cx + dx) for dx in (-1, 0, 1)] for dy in (-1, 0, 1)])
+        mines = around[size:2 * size, size:2 * size]
+        numbers = Board.neighbour_counts(around)[size:2 * size, size:2 * size]
+        numbers[mines] = 0
+        state = np.zeros((size, size), dtype=np.int8)
+        stored = self._stored.pop((cy, cx), None)
+        if stored is not None:
+            bits = np.unpackbits(np.frombuffer(zlib.decompress(stored), dtype=np.uint8))[:2 * size * size]
+            state = (bits[:size * size] * REVEALED | bits[size * size:] * FLAGGED).astype(np.int8).reshape(size, size)
+
+        chunk = self._chunks[(cy, cx)] = _Chunk(mines.copy(), numbers.copy(), state)
+        while len(self._chunks) > self.max_chunks:
+            self._evict()
+        return chunk
+
+    def _evict(self):
+        # Drops the least recently used chunk, keeping its state only if the player touched it
+        (cy, cx), chunk = self._chunks.popitem(last=False)
+        if chunk.state.any():
+            bits = np.concatenate([(chunk.state & REVEALED).ravel() != 0, (chunk.state & FLAGGED).ravel() != 0])
+            self._stored[(cy, cx)] = zlib.compress(np.packbits(bits).tobytes())
+
+    def _mines(self, cy, cx):
+        # Mines of a chunk, a pure function of the seed and the chunk coordinates
+        size = self.chunk_size
+        rng = np.random.default_rng([self.seed % 2 ** 64, cy % 2 ** 64, cx % 2 ** 64])
+        mines = rng.random((size, size)) < self.density
+        if self.safe_origin and -1 <= cy <= 0 and -1 <= cx <= 0:
+            # Clear the cells within one step of (0, 0) that fall in this chunk
+            for row in (-1, 0, 1):
+                for col in (-1, 0, 1):
+                    if divmod(row, size)[0] == cy and divmod(col, size)[0] == cx:
+                        mines[row % size, col % size] = False
+        return mines
+
+
+def main():
+    # Explores an endless board headlessly, the view following the proven safe cells
+    import argparse
+    import time
+
+    from PatternCache import PatternCache
+
+    parser = argparse.ArgumentParser(description="Explore an endless board with the solver.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--density", type=float, default=0.16)
+    parser.add_argument("--moves", type=int, default=200, help="Solver calls to make")
+    parser.add_argument("--view", type=int, default=48, help="Side of the square view the solver works on")
+    parser.add_argument("--max-chunks", type=int, default=16)
+    args = parser.parse_args()
+
+    board = ChunkedBoard(args.seed, args.density, max_chunks=args.max_chunks)
+    pattern_cache = PatternCache()
+    board.reveal(0, 0)
+    centre = (0, 0)
+    start = time.perf_counter()
+    for move in range(args.moves):
+        half = args.view // 2
+        safe, mines = board.deduce(centre[0] - half, centre[1] - half, args.view, args.view, pattern_cache)
+        for cell in mines:
+            board.set_flagged(*cell)
+        if not safe:
+            break
+        # The view follows the exploration
+        centre = min(safe, key=lambda cell: abs(cell[0] - centre[0]) + abs(cell[1] - centre[1]))
+        for cell in safe:
+            board.reveal(*cell)
+    elapsed = time.perf_counter() - start
+    print(f"{move + 1} solver calls in {elapsed:.2f} s, {board.revealed_count} cells revealed, "
+          f"{board.flagged_count} flagged, {board.memory()}")
+
+
+if __name__ == "__main__":
+    main()
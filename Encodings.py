@@ -0,0 +1,154 @@
+import argparse
+
+from z3 import AtLeast, AtMost, BoolVal, FreshBool, If, Not, Or, PbEq, Solver, SolverFor, Sum
+
+
+class Encoding:
+    """
+    Turns "exactly n of these cells are mines" into Z3 constraints.
+
+    AISolver only talks to Z3 through an encoding for its number constraints,
+    so the way a count is expressed, and the solver that receives it, can be
+    swapped without touching the solver logic. Subclasses implement exactly();
+    solver() can be overridden to hand the constraints to a different backend.
+    """
+    name = None
+
+    def exactly(self, variables, count):
+        """
+        Encodes that exactly count of the variables are true.
+
+        Args:
+            variables (list of BoolRef): One Bool per cell, true for a mine.
+            count (int): Number of mines among them.
+
+        Returns:
+            list of BoolRef: Constraints to add to the solver.
+        """
+        raise NotImplementedError
+
+    def solver(self):
+        """
+        Creates an empty solver suited to the constraints of this encoding.
+        """
+        return Solver()
+
+
+class ArithmeticEncoding(Encoding):
+    # The original form: Sum([If(mine, 1, 0), ...]) == count, solved with integer arithmetic
+    name = "arithmetic"
+
+    def exactly(self, variables, count):
+        return [Sum([If(variable, 1, 0) for variable in variables]) == count]
+
+
+class PseudoBooleanEncoding(Encoding):
+    # One pseudo-Boolean equality, handled natively by Z3's cardinality solver
+    name = "pb"
+
+    def exactly(self, variables, count):
+        return [PbEq([(variable, 1) for variable in variables], count)]
+
+
+class CardinalityEncoding(Encoding):
+    # A pair of AtMost/AtLeast cardinality constraints
+    name = "cardinality"
+
+    def exactly(self, variables, count):
+        return [AtMost(*variables, count), AtLeast(*variables, count)]
+
+
+class SequentialCounterEncoding(Encoding):
+    """
+    Plain CNF with the sequential counter of Sinz (2005).
+
+    Auxiliary variable s[i][j] means "at least j + 1 of the first i + 1
+    variables are true". At most k uses O(n * k) clauses, at least k is at
+    most n - k over the negated variables. Being pure clauses, the problem is
+    given to the QF_FD solver, which runs on Z3's SAT core without arithmetic.
+    """
+    name = "sequential"
+
+    def exactly(self, variables, count):
+        if count < 0 or count > len(variables):
+            return [BoolVal(False)]
+        return (self._at_most(variables, count)
+                + self._at_most([Not(variable) for variable in variables], len(variables) - count))
+
+    def solver(self):
+        return SolverFor("QF_FD")
+
+    @staticmethod
+    def _at_most(literals, k):
+        # Clauses that allow at most k of the literals to be true
+        n = len(literals)
+        if k >= n:
+            return []
+        if k == 0:
+            return [Not(literal) for literal in literals]
+        s = [[FreshBool() for _ in range(k)] for _ in range(n - 1)]
+        clauses = [Or(Not(literals[0]), s[0][0])]
+        clauses += [Not(s[0][j]) for j in range(1, k)]
+        for i in range(1, n - 1):
+            clauses.append(Or(Not(literals[i]), s[i][0]))
+            clauses.append(Or(Not(s[i - 1][0]), s[i][0]))
+            for j in range(1, k):
+                clauses.append(Or(Not(literals[i]), Not(s[i - 1][j - 1]), s[i][j]))
+                clauses.append(Or(Not(s[i - 1][j]), s[i][j]))
+            clauses.append(Or(Not(literals[i]), Not(s[i - 1][k - 1])))
+        clauses.append(Or(Not(literals[n - 1]), Not(s[n - 2][k - 1])))
+        return clauses
+
+
+ENCODINGS = {encoding.name: encoding for encoding in (
+    ArithmeticEncoding, PseudoBooleanEncoding, CardinalityEncoding, SequentialCounterEncoding,
+)}
+# Fastest end to end in the benchmark below on every difficulty. The sequential counter spends
+# the least time inside Z3, but building its clauses in Python costs more than that saves.
+DEFAULT_ENCODING = "pb"
+
+
+def get_encoding(encoding):
+    """
+    Looks an encoding up by name.
+
+    Args:
+        encoding (str or Encoding): A name from ENCODINGS, or an Encoding instance
+            which is returned as is.
+
+    Returns:
+        Encoding: The encoding.
+    """
+    if isinstance(encoding, Encoding):
+        return encoding
+    if encoding not in ENCODINGS:
+        raise ValueError(f"Unknown encoding: {encoding}")
+    return ENCODINGS[encoding]()
+
+
+def main():
+    # Plays the same games with every encoding and compares the solver latency
+    from Game import Game
+    from Simulator import Simulator, derive_seed, summarize
+
+    parser = argparse.ArgumentParser(description="Compare the constraint encodings on headless games.")
+    parser.add_argument("--difficulty", choices=sorted(Game.DIFFICULTIES), action="append",
+                        help="Difficulty to play, can be repeated (default: all)")
+    parser.add_argument("--games", type=int, default=50, help="Games per difficulty and encoding")
+    parser.add_argument("--seed", type=int, default=0, help="Master seed, shared by every encoding")
+    parser.add_argument("--mode", default="frontier", help="AISolver mode")
+    args = parser.parse_args()
+
+    for difficulty in args.difficulty or list(Game.DIFFICULTIES):
+        rows, cols, num_mines = Game.DIFFICULTIES[difficulty]
+        seeds = [derive_seed(args.seed, index) for index in range(args.games)]
+        for name in ENCODINGS:
+            simulator = Simulator(rows, cols, num_mines, mode=args.mode, encoding=name)
+            summary = summarize(simulator.run(seeds))
+            print(f"{difficulty:>6} {name:>11}: win rate {summary['win_rate']:.3f}, "
+                  f"latency mean/p95 {summary['latency_mean_ms']:.2f}/{summary['latency_p95_ms']:.2f} ms, "
+                  f"Z3 {summary['z3_ms_per_move']:.2f} ms/move")
+
+
+if __name__ == "__main__":
+    main()
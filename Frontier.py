@@ -0,0 +1,353 @@
+from operator import add
+
+from Board import Board
+
+# The eight rotations and reflections of the grid, as maps of (row, col)
+_SYMMETRIES = (
+    lambda r, c: (r, c), lambda r, c: (r, -c), lambda r, c: (-r, c), lambda r, c: (-r, -c),
+    lambda r, c: (c, r), lambda r, c: (c, -r), lambda r, c: (-c, r), lambda r, c: (-c, -r),
+)
+
+
+class Component:
+    def __init__(self, cells, constraints):
+        """
+        A group of frontier cells that share constraints with each other and
+        with no cell outside the group, so it can be solved on its own.
+
+        Args:
+            cells (list of tuples): Coordinates of the unknown cells in the component.
+            constraints (list of tuple): (cells, count) pairs, meaning exactly
+                `count` of the given cells are mines.
+        """
+        self.cells = cells
+        self.constraints = constraints
+        self._canonical = None
+
+    def canonical(self):
+        """
+        Describes the component independently of where it sits on the board
+        and of how it is oriented.
+
+        The constraints are rewritten under each of the eight rotations and
+        reflections of the grid, with coordinates relative to the top-left
+        cell, and the smallest result is kept. Two components with the same
+        key have the same solutions up to the symmetry between them, so results
+        computed for one can be reused for the other. Computed once per component.
+
+        Returns:
+            tuple: (key, index), where key is the canonical constraints and
+                index[i] is the position of self.cells[i] in the canonical
+                cell order.
+        """
+        if self._canonical is None:
+            best = None
+            for transform in _SYMMETRIES:
+                moved = [transform(r, c) for r, c in self.cells]
+                r0 = min(r for r, _ in moved)
+                c0 = min(c for _, c in moved)
+                position = {cell: (r - r0, c - c0) for cell, (r, c) in zip(self.cells, moved)}
+                key = tuple(sorted({
+                    (tuple(sorted(position[cell] for cell in scope)), count)
+                    for scope, count in self.constraints
+                }))
+                if best is None or key < best[0]:
+                    best = (key, position)
+            key, position = best
+            order = {cell: i for i, cell in enumerate(sorted(position.values()))}
+            self._canonical = (key, [order[position[cell]] for cell in self.cells])
+        return self._canonical
+
+    def count_solutions(self, checkpoint=None):
+        """
+        Counts the mine layouts that satisfy every constraint, grouped by how
+        many mines they use.
+
+        The cells are assigned one at a time in breadth-first order, so only a
+        few constraints are partially assigned at any point. Partial layouts that
+        leave the same remaining counts are merged, which keeps the work
+        proportional to the number of distinct states rather than the number of
+        solutions.
+
+        Args:
+            checkpoint (callable): Called before every cell is assigned, it may
+                raise to abandon the count.
+
+        Returns:
+            tuple: (counts, tallies), where counts[k] is the number of solutions
+                with k mines and tallies[k][i] is how many of them put a mine on
+                self.cells[i].
+        """
+        position = {cell: i for i, cell in enumerate(self.cells)}
+        touching = {cell: [] for cell in self.cells}
+        for j, (scope, _) in enumerate(self.constraints):
+            for cell in scope:
+                touching[cell].append(j)
+
+        # Breadth-first order over cells that share a constraint
+        order = []
+        seen = {self.cells[0]}
+        queue = [self.cells[0]]
+        while queue:
+            cell = queue.pop(0)
+            order.append(cell)
+            for j in touching[cell]:
+                for other in self.constraints[j][0]:
+                    if other not in seen:
+                        seen.add(other)
+                        queue.append(other)
+
+        # How many cells of each constraint are still unassigned after each step
+        unassigned = [len(scope) for scope, _ in self.constraints]
+        left_after = []
+        for cell in order:
+            for j in touching[cell]:
+                unassigned[j] -= 1
+            left_after.append([(j, unassigned[j]) for j in touching[cell]])
+
+        # state (remaining count per constraint) -> {k: [count, tallies in `order`]}
+        states = {tuple(count for _, count in self.constraints): {0: [1, []]}}
+        for step in left_after:
+            if checkpoint is not None:
+                checkpoint()
+            next_states = {}
+            for state, by_k in states.items():
+                for mine in (0, 1):
+                    remaining = list(state)
+                    for j, left in step:
+                        remaining[j] -= mine
+                        if remaining[j] < 0 or remaining[j] > left:
+                            break
+                    else:
+                        target = next_states.setdefault(tuple(remaining), {})
+                        for k, (count, tallies) in by_k.items():
+                            extended = tallies + [count * mine]
+                            merged = target.get(k + mine)
+                            if merged is None:
+                                target[k + mine] = [count, extended]
+                            else:
+                                merged[0] += count
+                                merged[1] = list(map(add, merged[1], extended))
+            states = next_states
+
+        size = len(self.cells)
+        counts = [0] * (size + 1)
+        tallies = [[0] * size for _ in range(size + 1)]
+        for by_k in states.values():
+            for k, (count, ordered) in by_k.items():
+                counts[k] += count
+                for cell, tally in zip(order, ordered):
+                    tallies[k][position[cell]] += tally
+        return counts, tallies
+
+
+class Frontier:
+    def __init__(self, grid):
+        """
+        Extracts the part of the board a solver actually has to reason about.
+
+        Every revealed number becomes a constraint over its unknown neighbours,
+        with flagged neighbours already subtracted from the count. Unknown cells
+        that no number touches form the interior, which is only kept as an
+        aggregate count since nothing distinguishes one interior cell from another.
+
+        Args:
+            grid (Board or list of list of dict): The game board.
+        """
+        self.board = Board.of(grid)
+        self.rows = self.board.rows
+        self.cols = self.board.cols
+        self.constraints = []
+        self.cells = set()
+        self.flagged_count = 0
+        self.revealed_mine_count = 0
+        self.interior_count = 0
+        self.components = []
+        self.safe = set()
+        self.mines = set()
+        self.consistent = True
+        self._build()
+
+    def _build(self):
+        # Collect one constraint per revealed cell that still has unknown neighbours,
+        # using whole-board neighbour counts so only those cells are visited in Python
+        board = self.board
+        revealed = board.revealed
+        flagged = board.flagged
+        unknown = board.unknown
+        revealed_mines = revealed & board.mines
+        self.flagged_count = int(flagged.sum())
+        self.revealed_mine_count = int(revealed_mines.sum())  # Mines are only revealed once the game is lost
+
+        known_mines = Board.neighbour_counts(flagged | revealed_mines)
+        sources = revealed & ~board.mines & (Board.neighbour_counts(unknown) > 0)
+        for r, c in zip(*sources.nonzero()):
+            r, c = int(r), int(c)
+            cells = tuple(
+                (ar, ac) for ar, ac in self._get_adjacent_cells(r, c) if unknown[ar, ac]
+            )
+            self.constraints.append((cells, int(board.numbers[r, c]) - int(known_mines[r, c])))
+            self.cells.update(cells)
+
+        self.interior_count = int(unknown.sum()) - len(self.cells)
+        self.components = self._split_components()
+
+    def apply_local_rules(self):
+        """
+        Resolves the trivial cases without a solver, until nothing changes.
+
+        A constraint whose count dropped to zero (the number equals its flagged
+        neighbours) makes all its cells safe, and a constraint whose count equals
+        its number of cells (the number equals its hidden neighbours) makes all of
+        them mines. Every resolved cell is removed from the other constraints,
+        which can trigger further rules. Afterwards only the residue is left in
+        `constraints`, `cells` and `components`.
+
+        Returns:
+            tuple: (safe, mines) sets of coordinates resolved by the rules.
+        """
+        constraints = [[set(cells), count] for cells, count in self.constraints]
+        by_cell = {}
+        for constraint in constraints:
+            for cell in constraint[0]:
+                by_cell.setdefault(cell, []).append(constraint)
+
+        queue = list(constraints)
+        while queue:
+            scope, count = queue.pop()
+            if count < 0 or count > len(scope):
+                self.consistent = False  # The flags contradict the numbers
+                break
+            if not scope:
+                continue
+            if count == 0:
+                resolved, is_mine = self.safe, False
+            elif count == len(scope):
+                resolved, is_mine = self.mines, True
+            else:
+                continue
+
+            for cell in list(scope):
+                resolved.add(cell)
+                for other in by_cell[cell]:
+                    other[0].discard(cell)
+                    other[1] -= is_mine
+                    queue.append(other)
+
+        self.constraints = [(tuple(sorted(scope)), count) for scope, count in constraints if scope]
+        self.cells = {cell for cells, _ in self.constraints for cell in cells}
+        self.components = self._split_components()
+        return self.safe, self.mines
+
+    def apply_pairwise_rules(self, checkpoint=None):
+        """
+        Resolves what pairs of overlapping constraints imply, on top of the local rules.
+
+        For two constraints A and B sharing cells, the shared cells hold at most
+        min(|A & B|, count B) mines, so A - B holds at least the rest of A's
+        count; when that is every cell of A - B, they are all mines. The shared
+        cells also hold at least count A - |A - B| mines, and when that uses up
+        B's count, every cell of B - A is safe. This covers the subset rule (A
+        inside B) as well as patterns such as 1-2-1 and 1-2 along a wall. Cells
+        resolved here go through the local rules again, until neither rule
+        finds anything new.
+
+        Args:
+            checkpoint (callable): Called between the pairs compared, it may
+                raise to abandon the rules.
+
+        Returns:
+            tuple: (safe, mines) sets of coordinates resolved by both kinds of rules.
+        """
+        self.apply_local_rules()
+        while self.consistent:
+            safe, mines = self._pairwise_deductions(checkpoint)
+            if not safe and not mines:
+                break
+            # Resolved cells become one-cell constraints, which the local rules propagate
+            self.constraints += [((cell,), 0) for cell in safe] + [((cell,), 1) for cell in mines]
+            self.apply_local_rules()
+        return self.safe, self.mines
+
+    def _pairwise_deductions(self, checkpoint=None):
+        # One pass of the pairwise rule over every pair of constraints that share a cell
+        scopes = [(set(cells), count) for cells, count in self.constraints]
+        by_cell = {}
+        for i, (scope, _) in enumerate(scopes):
+            for cell in scope:
+                by_cell.setdefault(cell, []).append(i)
+        pairs = {(a, b) for indices in by_cell.values() for a in indices for b in indices if a != b}
+
+        safe, mines = set(), set()
+        for a, b in pairs:
+            if checkpoint is not None:
+                checkpoint()
+            (scope_a, count_a), (scope_b, count_b) = scopes[a], scopes[b]
+            shared = len(scope_a & scope_b)
+            only_a = scope_a - scope_b
+            only_b = scope_b - scope_a
+            if only_a and count_a - min(shared, count_b) == len(only_a):
+                mines |= only_a
+            if only_b and count_b - max(0, count_a - len(only_a)) == 0:
+                safe |= only_b
+        return safe, mines
+
+    def _split_components(self):
+        """
+        Splits the constraints into independent groups with a union-find over
+        the cells they mention.
+
+        Returns:
+            list of Component: The connected components of the frontier.
+        """
+        parent = {cell: cell for cell in self.cells}
+
+        def find(cell):
+            while parent[cell] != cell:
+                parent[cell] = parent[parent[cell]]
+                cell = parent[cell]
+            return cell
+
+        for cells, _ in self.constraints:
+            root = find(cells[0])
+            for other in cells[1:]:
+                other_root = find(other)
+                if other_root != root:
+                    parent[other_root] = root
+
+        groups = {}
+        for cell in self.cells:
+            groups.setdefault(find(cell), ([], []))[0].append(cell)
+        for constraint in self.constraints:
+            groups[find(constraint[0][0])][1].append(constraint)
+
+        return [Component(sorted(cells), constraints) for cells, constraints in groups.values()]
+
+    def interior_cells(self):
+        """
+        Generates the unknown cells that no revealed number touches.
+
+        Yields:
+            tuple: Coordinates of an interior cell.
+        """
+        interior = self.board.unknown & ~self.board.frontier_mask()
+        for r, c in zip(*interior.nonzero()):
+            yield (int(r), int(c))
+
+    def _get_adjacent_cells(self, row, col):
+        """
+        Gets the coordinates of adjacent cells for a given cell.
+
+        Args:
+            row (int): Row index.
+            col (int): Column index.
+
+        Returns:
+            list of tuples: Adjacent cell coordinates.
+        """
+        return [
+            (row + dr, col + dc)
+            for dr in (-1, 0, 1)
+            for dc in (-1, 0, 1)
+            if (dr or dc) and 0 <= row + dr < self.rows and 0 <= col + dc < self.cols
+        ]
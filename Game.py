@@ -1,10 +1,21 @@
 import pygame
-import random
+
+from Board import Board
+from Renderer import get_font
+import Replay
 
 
 class Game:
-    def __init__(self):
-        pygame.init()
+    # Board presets as (rows, cols, mines)
+    DIFFICULTIES = {
+        "easy": (8, 8, 10),
+        "medium": (16, 16, 40),
+        "hard": (16, 30, 99),
+    }
+    NO_GUESS_TIME_LIMIT = 0.5  # Seconds the first click may spend looking for a no-guess board
+
+    def __init__(self, headless=False):
+        # headless skips the window so the board logic can run without a display
         self.WIDTH, self.HEIGHT = 600, 600
         self.GRID_SIZE = 30
         self.CELL_SIZE = self.WIDTH // self.GRID_SIZE
@@ -15,22 +26,33 @@ class Game:
         self.BLACK = (0, 0, 0)
         self.RED = (255, 0, 0)
         self.YELLOW = (255, 255, 0)  # For highlighting probable mines
+        self.last_revealed = []  # Cells revealed by the last handle_click
+        self.moves = []  # (action, row, col) moves of the current game, see Replay
 
+        if headless:
+            self.screen = None
+            self.clock = None
+            return
+        pygame.init()
         self.screen = pygame.display.set_mode((self.WIDTH, self.HEIGHT))
         pygame.display.set_caption("Minesweeper")
         self.clock = pygame.time.Clock()
 
 
-    def main_menu(self):
+    def main_menu(self, custom=None):
         # Function to display the main menu where the user selects difficulty
+        # custom is an optional (rows, cols, mines) offered as an extra option
 
         self.WIDTH, self.HEIGHT = 600, 600  # Resize screen for the menu
         self.screen = pygame.display.set_mode((self.WIDTH, self.HEIGHT))
         self.screen.fill(self.WHITE)  # Fill the screen with white background
-        font = pygame.font.SysFont(None, 48)  # Font for the menu options
+        font = get_font(48)  # Font for the menu options
 
-        # Menu options with corresponding difficulty settings
-        options = ["Easy (8x8, 10 Mines)", "Medium (16x16, 40 Mines)", "Hard (16x30, 99 Mines)"]
+        # Menu options with corresponding difficulty settings, plus the custom size if one was given
+        settings = [(name, (rows, cols), mines) for name, (rows, cols, mines) in self.DIFFICULTIES.items()]
+        if custom is not None:
+            settings.append(("custom", custom[:2], custom[2]))
+        options = [f"{name.title()} ({rows}x{cols}, {mines} Mines)" for name, (rows, cols), mines in settings]
         buttons = []  # List to store button positions and texts
         y_offset = 150  # Initial vertical offset for the first option
 
@@ -53,68 +75,52 @@ class Game:
                     exit()
                 elif event.type == pygame.MOUSEBUTTONDOWN:
                     x, y = event.pos  # Get mouse click position
-                    for rect, option in buttons:
+                    for (rect, option), (_, size, mines) in zip(buttons, settings):
                         if rect.collidepoint(x, y):  # Check if the click was on a button
-                            if "Easy" in option:
-                                return 8, 10  # Return easy grid size and number of mines
-                            elif "Medium" in option:
-                                return 16, 40  # Return medium grid size and number of mines
-                            elif "Hard" in option:
-                                return (16,30), 99  # Return hard grid size and number of mines
-
-
-    def create_grid(self,rows, cols, num_mines):
-        # Function to create the game grid with mines and numbers
-        grid = [[{"mine": False, "revealed": False, "flagged": False, "number": 0} for _ in range(cols)] for _ in range(rows)]
-
-        # Randomly place mines in the grid
-        mines = random.sample(range(rows * cols), num_mines)  # Randomly pick mine locations
-        for mine in mines:
-            row, col = divmod(mine, cols)  # Convert the flat index to row/col position
-            grid[row][col]["mine"] = True  # Mark the cell as containing a mine
-
-        # Calculate the numbers for each non-mine cell based on adjacent mines
-        directions = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
-        for r in range(rows):
-            for c in range(cols):
-                if not grid[r][c]["mine"]:  # Skip cells that contain mines
-                    grid[r][c]["number"] = sum(
-                        grid[r + dr][c + dc]["mine"]
-                        for dr, dc in directions
-                        if 0 <= r + dr < rows and 0 <= c + dc < cols  # Check boundaries
-                    )
-        return grid  # Return the generated grid
-
-
-    def draw_grid(self,screen, grid):
-        rows, cols = len(grid), len(grid[0])
-        x_offset = (self.WIDTH - (cols * self.CELL_SIZE)) // 2  # Center the grid horizontally
-        y_offset = 50  # Offset grid for UI space
-        for r in range(rows):
-            for c in range(cols):
-                x, y = c * self.CELL_SIZE + x_offset, r * self.CELL_SIZE + y_offset  # Adjust for offsets
-                pygame.draw.rect(screen, self.GRAY if grid[r][c]["revealed"] else self.WHITE, (x, y, self.CELL_SIZE, self.CELL_SIZE))  # Draw the cell
-                pygame.draw.rect(screen, self.BLACK, (x, y, self.CELL_SIZE, self.CELL_SIZE), 1)  # Cell border
-
-                if grid[r][c]["revealed"]:  # If the cell is revealed, show its content
-                    if grid[r][c]["mine"]:
-                        pygame.draw.circle(screen, self.RED, (x + self.CELL_SIZE // 2, y + self.CELL_SIZE // 2), self.CELL_SIZE // 4)  # Draw mine
-                    elif grid[r][c]["number"] > 0:
-                        font = pygame.font.SysFont(None, 36)  # Font for the number
-                        text = font.render(str(grid[r][c]["number"]), True, self.BLACK)  # Render the number
-                        screen.blit(text, (x + 10, y + 5))  # Position the number inside the cell
-                elif grid[r][c]["flagged"]:  # Draw a flag if the cell is flagged
-                    pygame.draw.polygon(screen, self.RED, [
-                        (x + self.CELL_SIZE // 4, y + self.CELL_SIZE // 4),
-                        (x + 3 * self.CELL_SIZE // 4, y + self.CELL_SIZE // 2),
-                        (x + self.CELL_SIZE // 4, y + 3 * self.CELL_SIZE // 4)
-                    ])
-    
+                            return size, mines  # Return (rows, cols) and number of mines
+
+
+    def create_grid(self,rows, cols, num_mines, rng=None, safe_cell=None):
+        # Function to create the game board with mines and numbers
+        # rng is an optional random.Random, so a seeded board does not depend on the global random state
+        # safe_cell keeps a cell and its neighbours free of mines
+        return Board.create(rows, cols, num_mines, rng, safe_cell=safe_cell)  # Numbers come from a vectorized neighbour count
+
+
+    def prepare_first_click(self, grid, row, col, no_guess=False):
+        # Makes the first click safe by moving mines away from it, or with no_guess
+        # replaces the layout with one that can be cleared from there without guessing
+        # The no-guess search runs on the UI thread, so it is cut off after NO_GUESS_TIME_LIMIT
+        # seconds and the board only gets a safe first click; returns False in that case
+        if no_guess:
+            try:
+                board = Board.create_no_guess(grid.rows, grid.cols, grid.num_mines, first_click=(row, col),
+                                              time_limit=self.NO_GUESS_TIME_LIMIT)
+            except ValueError:
+                grid.clear_around(row, col)
+                return False
+            grid.reset_mines(board.mines)
+        else:
+            grid.clear_around(row, col)
+        return True
+
+
+    def record_move(self, action, row, col):
+        # Adds a move (Replay.REVEAL, FLAG or UNFLAG) to the record of the current game
+        self.moves.append((action, row, col))
+
+
+    def save_game(self, grid, filename="games.msr"):
+        # Appends the current game to a replay file and starts a new record
+        # The mines are taken now, after the first click may have moved them
+        if self.moves:
+            Replay.save([Replay.GameRecord(grid.mines, self.moves)], filename)
+        self.moves = []
 
 
     def game_ui(self,screen, timer, flagged_count, total_mines):
         # Function to display the game UI: timer, flagged count, and menu button
-        font = pygame.font.SysFont(None, 36)
+        font = get_font(36)
         padding = 20  # Padding for UI elements around the edges
 
         # Dynamic positions for UI elements
@@ -141,21 +147,8 @@ class Game:
 
     def reveal_cell(self,grid, row, col):
         # Function to reveal a cell and its surrounding cells if necessary
-        try:
-            if grid[row][col]["revealed"] or grid[row][col]["flagged"]:  # Check if the cell is already revealed or flagged
-                return
-        except IndexError:
-            print(f"Invalid access: row={row}, col={col}")
-            return
-
-        grid[row][col]["revealed"] = True  # Mark the cell as revealed
-
-        # If the revealed cell has no adjacent mines, reveal surrounding cells
-        if grid[row][col]["number"] == 0 and not grid[row][col]["mine"]:
-            directions = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
-            for dr, dc in directions:
-                if 0 <= row + dr < self.GRID_SIZE and 0 <= col + dc < self.GRID_SIZE:
-                    self.reveal_cell(grid, row + dr, col + dc)
+        # Returns the newly revealed cells so the solver and renderer only update those
+        return grid.reveal(row, col)  # Iterative flood fill bounded by the board's real size
 
 
     def handle_click(self,grid, x, y, game_over):
@@ -164,28 +157,21 @@ class Game:
             return False  # Game already over, no further actions
 
         col, row = x // self.CELL_SIZE, y // self.CELL_SIZE  # Convert mouse position to grid position
+        self.last_revealed = []  # Cells revealed by this click
         cell = grid[row][col]
+        self.record_move(Replay.REVEAL, row, col)
 
         if cell["mine"]:
             return True  # Game over if the clicked cell is a mine
         else:
-            self.reveal_cell(grid, row, col)  # Reveal the clicked cell
+            self.last_revealed = self.reveal_cell(grid, row, col)  # Reveal the clicked cell
             return False  # Continue the game
 
 
     def reveal_all_mines(self,grid):
         # Function to reveal all the mines on the grid (called when the game is over)
-        for row in grid:
-            for cell in row:
-                if cell["mine"]:
-                    cell["revealed"] = True
+        grid.reveal_mines()
                     
-    def highlight_probable_mines(self,screen, probable_mines, x_offset, y_offset, CELL_SIZE):
-        #Highlights cells that are probable mines in blue.
-        for r, c in probable_mines:
-            x, y = c * self.CELL_SIZE + x_offset, r * self.CELL_SIZE + y_offset
-            pygame.draw.rect(screen, (255, 0, 0), (x, y, self.CELL_SIZE, self.CELL_SIZE), 3)
-            
     def initialize_game(self, rows, cols, num_mines):
        #Resets the game to its initial state.
     
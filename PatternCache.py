@@ -0,0 +1,180 @@
+import os
+import pickle
+import threading
+from collections import OrderedDict
+
+# Bumped whenever the stored results change shape, older files are then ignored
+FORMAT_VERSION = 1
+
+
+class PatternCache:
+    def __init__(self, maxsize=100000, path=None):
+        """
+        Remembers solved frontier components across moves and games.
+
+        Results are stored under the canonical form of the component (see
+        Component.canonical), so a 1-2-1 along any wall, or the same corner in
+        any orientation, is solved once. Two kinds of results are kept:
+        "deduction", the (safe, mines) cells proven by the solver, and "counts",
+        the output of Component.count_solutions(). Per-cell results are stored
+        in canonical cell order and mapped back onto the asking component.
+
+        The least recently used entries are evicted beyond maxsize. With a path
+        the cache is loaded from it if the file exists, and save() writes it
+        back, so a warm cache survives restarts.
+
+        Args:
+            maxsize (int): Number of results kept in memory.
+            path (str): Optional file to load from and save to.
+        """
+        self.maxsize = maxsize
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self.saved_time = 0.0  # Seconds the hits would have cost to recompute
+        self._entries = OrderedDict()  # (kind, key) -> (canonical result, seconds it took)
+        self._lock = threading.Lock()  # A solver thread of an old game may still be finishing
+        self.journal = None  # Set to a list to collect every entry put from then on, see merge()
+        if path and os.path.exists(path):
+            self.load(path)
+
+    def get(self, component, kind):
+        """
+        Looks up a result for the component.
+
+        Args:
+            component (Component): The component to solve.
+            kind (str): "deduction" or "counts".
+
+        Returns:
+            The result in the component's own coordinates, or None if unknown.
+        """
+        key, index = component.canonical()
+        with self._lock:
+            entry = self._entries.get((kind, key))
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end((kind, key))
+            self.hits += 1
+            self.saved_time += entry[1]
+        value = entry[0]
+        if kind == "deduction":
+            return (
+                {cell for cell, i in zip(component.cells, index) if value[i] == 0},
+                {cell for cell, i in zip(component.cells, index) if value[i] == 1},
+            )
+        counts, tallies = value
+        return list(counts), [[row[i] for i in index] for row in tallies]
+
+    def put(self, component, kind, result, cost=0.0):
+        """
+        Stores a result for the component.
+
+        Args:
+            component (Component): The component that was solved.
+            kind (str): "deduction" or "counts".
+            result: (safe, mines) sets of coordinates for "deduction",
+                (counts, tallies) for "counts".
+            cost (float): Seconds it took to compute, credited on every later hit.
+        """
+        key, index = component.canonical()
+        if kind == "deduction":
+            safe, mines = result
+            value = [None] * len(index)
+            for cell, i in zip(component.cells, index):
+                value[i] = 0 if cell in safe else 1 if cell in mines else None
+            value = tuple(value)
+        else:
+            counts, tallies = result
+            value = (tuple(counts), tuple(self._reorder(row, index) for row in tallies))
+        with self._lock:
+            self._entries[(kind, key)] = (value, cost)
+            self._entries.move_to_end((kind, key))
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+            if self.journal is not None:
+                self.journal.append(((kind, key), (value, cost)))
+
+    def merge(self, entries):
+        """
+        Adds entries collected in the journal of another cache, such as the
+        copy a solver process works with.
+
+        Args:
+            entries (list): ((kind, key), (result, cost)) pairs from a journal.
+        """
+        with self._lock:
+            for key, entry in entries:
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def __getstate__(self):
+        # The lock cannot be pickled, a copy sent to another process gets its own
+        with self._lock:
+            state = dict(self.__dict__, _entries=OrderedDict(self._entries))
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _reorder(row, index):
+        # Moves per-cell values from component order to canonical order
+        ordered = [0] * len(row)
+        for value, i in zip(row, index):
+            ordered[i] = value
+        return tuple(ordered)
+
+    def stats(self):
+        """
+        Returns:
+            dict: Entries held, hits, misses, hit rate and the seconds saved by hits.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "saved_time": self.saved_time,
+        }
+
+    def load(self, path=None):
+        """
+        Adds the entries of a saved cache, keeping at most maxsize of them.
+
+        Args:
+            path (str): File written by save(), defaults to self.path.
+        """
+        with open(path or self.path, "rb") as file:
+            data = pickle.load(file)
+        if data.get("version") != FORMAT_VERSION:
+            return
+        with self._lock:
+            for key, entry in data["entries"][-self.maxsize:]:
+                self._entries[key] = entry
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def save(self, path=None):
+        """
+        Writes the cache to disk, least recently used entries first.
+
+        The file is written next to the target and renamed over it, so a
+        crash never leaves a truncated cache behind.
+
+        Args:
+            path (str): Target file, defaults to self.path.
+        """
+        path = path or self.path
+        with self._lock:
+            entries = list(self._entries.items())
+        temporary = f"{path}.tmp"
+        with open(temporary, "wb") as file:
+            pickle.dump({"version": FORMAT_VERSION, "entries": entries}, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, path)
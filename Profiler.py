@@ -0,0 +1,144 @@
+import math
+import time
+import weakref
+from contextlib import contextmanager
+
+# Z3 statistics that are summed over the checks of a call, the memory ones keep their peak instead
+Z3_COUNTERS = ("conflicts", "decisions", "propagations")
+Z3_PEAKS = ("memory", "max memory")
+
+
+class Profiler:
+    def __init__(self, callback=None):
+        """
+        Collects per-phase timings and sizes of AISolver calls.
+
+        Pass an instance to AISolver(profiler=...) to turn instrumentation on;
+        without one the solver only pays for a None check per phase. Every
+        public solver call (suggest_moves, deduce, mine_probabilities,
+        identify_mines) produces one record, nested calls are folded into the
+        outermost one. A record is a plain dict:
+
+            {"call": "suggest_moves", "total": seconds,
+             "phases": {"frontier": seconds, "build": ..., "check": ..., ...},
+             "counts": {"constraints": n, "variables": n, "checks": n, ...},
+             "z3": {"conflicts": n, "decisions": n, "memory": megabytes, ...}}
+
+        Args:
+            callback (callable): Called with every finished record.
+        """
+        self.callback = callback
+        self.last = None  # Record of the latest call
+        self.calls = 0
+        self.totals = {}  # Phase -> seconds, summed over every call
+        self.counts = {}  # Counter -> value, summed over every call
+        self._record = None
+        self._z3_seen = weakref.WeakKeyDictionary()  # Solver -> its cumulative statistics at the last read
+
+    @contextmanager
+    def call(self, name):
+        # Times a public solver call, only the outermost one opens a record
+        if self._record is not None:
+            yield
+            return
+        record = self._record = {"call": name, "total": 0.0, "phases": {}, "counts": {}, "z3": {}}
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            record["total"] = time.perf_counter() - start
+            self._record = None
+            self._finish(record)
+
+    @contextmanager
+    def phase(self, name):
+        # Adds the time spent in the block to a phase of the current record
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            if self._record is not None:
+                phases = self._record["phases"]
+                phases[name] = phases.get(name, 0.0) + time.perf_counter() - start
+
+    def count(self, name, value=1):
+        """
+        Adds value to a counter of the current record.
+
+        Args:
+            name (str): Counter, for example "constraints" or "frontier_cells".
+            value (int): Amount to add.
+        """
+        if self._record is not None:
+            counts = self._record["counts"]
+            counts[name] = counts.get(name, 0) + value
+
+    def z3_statistics(self, solver):
+        """
+        Adds what a Z3 solver did since it was last read to the current record.
+
+        Z3 keeps its statistics cumulative per solver, so the values read last
+        time are remembered and only the difference is counted. That matters
+        for the persistent solver of the incremental mode.
+
+        Args:
+            solver (Solver): The solver that just ran a check.
+        """
+        if self._record is None:
+            return
+        statistics = solver.statistics()
+        values = {key: statistics.get_key_value(key) for key in statistics.keys()
+                  if key in Z3_COUNTERS or key in Z3_PEAKS}
+        before = self._z3_seen.get(solver, {})
+        self._z3_seen[solver] = values
+        z3 = self._record["z3"]
+        for key, value in values.items():
+            if key in Z3_COUNTERS:
+                z3[key] = z3.get(key, 0) + value - before.get(key, 0)
+            else:
+                z3[key] = max(z3.get(key, 0.0), value)
+
+    def summary(self):
+        """
+        Averages the recorded calls.
+
+        Returns:
+            dict: Number of calls, mean milliseconds per call of every phase and
+                of the whole call, and mean value per call of every counter.
+        """
+        calls = max(1, self.calls)
+        return {
+            "calls": self.calls,
+            "total_ms": 1000 * self.totals.get("total", 0.0) / calls,
+            "phases_ms": {name: 1000 * seconds / calls for name, seconds in self.totals.items() if name != "total"},
+            "counts": {name: value / calls for name, value in self.counts.items()},
+        }
+
+    def _finish(self, record):
+        self.last = record
+        self.calls += 1
+        self.totals["total"] = self.totals.get("total", 0.0) + record["total"]
+        for name, seconds in record["phases"].items():
+            self.totals[name] = self.totals.get(name, 0.0) + seconds
+        for source in (record["counts"], {key: record["z3"][key] for key in Z3_COUNTERS if key in record["z3"]}):
+            for name, value in source.items():
+                self.counts[name] = self.counts.get(name, 0) + value
+        if self.callback is not None:
+            self.callback(record)
+
+
+def percentile(sorted_values, q):
+    """
+    Nearest-rank percentile, shared by every benchmark so their tail latencies compare.
+
+    Args:
+        sorted_values (sequence): Values in ascending order, a list or a NumPy array.
+        q (float): Percentile, between 0 and 100.
+
+    Returns:
+        The smallest value with at least q percent of the values at or below it,
+        or 0.0 if there are none.
+    """
+    if len(sorted_values) == 0:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, max(0, math.ceil(q / 100 * len(sorted_values)) - 1))]
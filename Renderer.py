@@ -0,0 +1,168 @@
+import numpy as np
+import pygame
+
+# Base tile of a cell, numbers 1-8 use REVEALED_EMPTY + number
+HIDDEN = 0
+FLAG = 1
+MINE = 2
+REVEALED_EMPTY = 3
+
+SHADES = 8  # Probability overlays are drawn in this many steps
+BORDER_MINE = 1
+BORDER_GUESS = 2
+
+_fonts = {}
+_tiles = {}  # (cell size, tile key) -> Surface, shared by every Renderer
+
+
+def get_font(size):
+    """
+    Returns the default system font at the given size, created only once.
+
+    pygame.font.SysFont looks the font up every time it is called, which is
+    far too slow to do per cell or per frame.
+
+    Args:
+        size (int): Font size.
+
+    Returns:
+        pygame.font.Font: The cached font.
+    """
+    if size not in _fonts:
+        _fonts[size] = pygame.font.SysFont(None, size)
+    return _fonts[size]
+
+
+class Renderer:
+    def __init__(self, game, board, x_offset, y_offset):
+        """
+        Draws the board incrementally onto a persistent surface.
+
+        Every cell is summarised by a tile key (base tile, risk shade and
+        highlight border). Each frame the keys are recomputed with NumPy and
+        only the cells whose key changed are blitted, from tile surfaces that
+        are rendered once per cell size. draw() returns the rectangles that
+        changed so the caller can pass them to pygame.display.update().
+
+        Args:
+            game (Game): Provides the cell size and colours.
+            board (Board): The board to draw.
+            x_offset (int): Screen x of the board's left edge.
+            y_offset (int): Screen y of the board's top edge.
+        """
+        self.game = game
+        self.board = board
+        self.cell_size = game.CELL_SIZE
+        self.x_offset = x_offset
+        self.y_offset = y_offset
+        self.surface = pygame.Surface((board.cols * self.cell_size, board.rows * self.cell_size))
+        self.shown = np.full((board.rows, board.cols), -1, dtype=np.int32)  # Key drawn on each cell
+        self.overlay = np.zeros((board.rows, board.cols), dtype=np.int32)
+        self._drawn_version = None
+        self._overlay_version = 0
+        for key in range(REVEALED_EMPTY + 9):
+            self._tile(key)  # Pre-render the plain digit, flag and mine tiles for this cell size
+
+    def set_overlay(self, probabilities=None, probable_mines=(), best_guess=None):
+        """
+        Sets the AI highlights: a red shade by mine probability, a red border on
+        suspected mines and a green border on the suggested guess.
+
+        Args:
+            probabilities (dict): Maps cell coordinates to mine probability.
+            probable_mines (iterable of tuples): Cells to outline in red.
+            best_guess (tuple): Cell to outline in green.
+        """
+        self.overlay[:] = 0
+        for (r, c), probability in (probabilities or {}).items():
+            self.overlay[r, c] = 16 * int(round(probability * SHADES))
+        for r, c in probable_mines:
+            self.overlay[r, c] = self.overlay[r, c] % (16 * (SHADES + 1)) + 16 * (SHADES + 1) * BORDER_MINE
+        if best_guess is not None:
+            r, c = best_guess
+            self.overlay[r, c] = self.overlay[r, c] % (16 * (SHADES + 1)) + 16 * (SHADES + 1) * BORDER_GUESS
+        self._overlay_version += 1
+
+    def draw(self, screen, force=False):
+        """
+        Redraws the cells that changed since the last call.
+
+        Args:
+            screen (pygame.Surface): The display surface.
+            force (bool): Redraw the whole board, for example after the screen was cleared.
+
+        Returns:
+            list of pygame.Rect: Screen areas that were drawn.
+        """
+        board = self.board
+        version = (board.version, self._overlay_version)
+        if version == self._drawn_version and not force:
+            return []  # Nothing changed, an idle board costs nothing
+        self._drawn_version = version
+
+        keys = self._keys()
+        changed = (keys != self.shown) | force
+        rows, cols = changed.nonzero()
+        size = self.cell_size
+        for r, c, key in zip(rows.tolist(), cols.tolist(), keys[rows, cols].tolist()):
+            self.surface.blit(self._tile(key), (c * size, r * size))
+        self.shown = keys
+
+        if len(rows) == 0:
+            return []
+        if len(rows) > 64:
+            # Many small rectangles cost more than one covering the board
+            area = pygame.Rect(self.x_offset, self.y_offset, self.surface.get_width(), self.surface.get_height())
+            screen.blit(self.surface, area)
+            return [area]
+        dirty = []
+        for r, c in zip(rows.tolist(), cols.tolist()):
+            area = pygame.Rect(c * size, r * size, size, size)
+            screen.blit(self.surface, area.move(self.x_offset, self.y_offset), area)
+            dirty.append(area.move(self.x_offset, self.y_offset))
+        return dirty
+
+    def _keys(self):
+        # Tile key of every cell, computed for the whole board at once
+        board = self.board
+        revealed = board.revealed
+        base = np.where(
+            revealed,
+            np.where(board.mines, MINE, REVEALED_EMPTY + board.numbers.astype(np.int32)),
+            np.where(board.flagged, FLAG, HIDDEN),
+        )
+        return base + np.where(revealed, 0, self.overlay)
+
+    def _tile(self, key):
+        # Surface for a tile key, rendered the first time it is needed at this cell size
+        game, size = self.game, self.cell_size
+        if (size, key) in _tiles:
+            return _tiles[(size, key)]
+        base, shade, border = key % 16, key // 16 % (SHADES + 1), key // (16 * (SHADES + 1))
+
+        tile = pygame.Surface((size, size))
+        tile.fill(game.WHITE if base in (HIDDEN, FLAG) else game.GRAY)
+        pygame.draw.rect(tile, game.BLACK, (0, 0, size, size), 1)
+        if base == FLAG:
+            pygame.draw.polygon(tile, game.RED, [
+                (size // 4, size // 4),
+                (3 * size // 4, size // 2),
+                (size // 4, 3 * size // 4)
+            ])
+        elif base == MINE:
+            pygame.draw.circle(tile, game.RED, (size // 2, size // 2), size // 4)
+        elif base > REVEALED_EMPTY:
+            text = get_font(min(36, size + 6)).render(str(base - REVEALED_EMPTY), True, game.BLACK)
+            tile.blit(text, text.get_rect(center=(size // 2, size // 2)))
+
+        if shade:
+            overlay = pygame.Surface((size, size), pygame.SRCALPHA)
+            overlay.fill((255, 0, 0, 160 * shade // SHADES))
+            tile.blit(overlay, (0, 0))
+        if border == BORDER_MINE:
+            pygame.draw.rect(tile, (255, 0, 0), (0, 0, size, size), 3)
+        elif border == BORDER_GUESS:
+            pygame.draw.rect(tile, (0, 160, 0), (0, 0, size, size), 3)
+
+        _tiles[(size, key)] = tile
+        return tile
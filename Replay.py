@@ -0,0 +1,276 @@
+import argparse
+import mmap
+import struct
+import time
+
+import numpy as np
+
+from Board import Board
+from Profiler import percentile
+
+MAGIC = b"MSRP"
+VERSION = 1
+# magic, version, flags, rows, cols, mines, seed, number of moves, bytes of the move log
+HEADER = struct.Struct("<4sBBxxIIIQII")
+SEEDED = 1  # Header flag: the seed field is meaningful
+
+# Move actions, stored in the two low bits of every move
+REVEAL = 0
+FLAG = 1
+UNFLAG = 2
+
+
+class GameRecord:
+    def __init__(self, mines, moves=None, seed=None):
+        """
+        One recorded game: the mine layout and every move made on it.
+
+        In a file, a record is a fixed header followed by the mines as a packed
+        bitmap (one bit per cell) and the move log. Each move is one varint:
+        the zigzag-encoded distance from the previous move's cell, shifted
+        left by two, with the action in the two low bits. Moves close to each
+        other, which is most of them, take one or two bytes. Records are simply
+        concatenated, so a corpus is one file that games are appended to.
+
+        Args:
+            mines (numpy.ndarray): 2D bool array of the mine layout.
+            moves (list of tuple): (action, row, col) moves, actions are REVEAL,
+                FLAG or UNFLAG.
+            seed (int): Optional seed the board was generated from, for reference.
+        """
+        self.mines = np.array(mines, dtype=bool)
+        self.rows, self.cols = self.mines.shape
+        self.moves = list(moves or [])
+        self.seed = seed
+
+    @property
+    def num_mines(self):
+        return int(self.mines.sum())
+
+    def record(self, action, row, col):
+        self.moves.append((action, row, col))
+
+    def board(self):
+        """
+        Returns:
+            Board: A fresh board with the recorded mines, nothing revealed.
+        """
+        return Board(self.mines)
+
+    def states(self):
+        """
+        Replays the moves on a fresh board.
+
+        The same board is updated in place between the items, copy it to keep
+        an intermediate state.
+
+        Yields:
+            tuple: (board, move, changed) after every move, where changed lists
+                the cells the move revealed or (un)flagged.
+        """
+        board = self.board()
+        for move in self.moves:
+            action, row, col = move
+            if action == REVEAL:
+                changed = board.reveal(row, col)
+            else:
+                board.set_flagged(row, col, action == FLAG)
+                changed = [(row, col)]
+            yield board, move, changed
+
+    def to_bytes(self):
+        """
+        Returns:
+            bytes: The record in the binary format described above.
+        """
+        log = bytearray()
+        previous = 0
+        for action, row, col in self.moves:
+            index = row * self.cols + col
+            delta = index - previous
+            previous = index
+            _write_varint(log, ((delta << 1) ^ (delta >> 63)) << 2 | action)  # Zigzag, then the action
+        header = HEADER.pack(
+            MAGIC, VERSION, SEEDED if self.seed is not None else 0, self.rows, self.cols, self.num_mines,
+            (self.seed or 0) % 2 ** 64, len(self.moves), len(log),
+        )
+        return header + np.packbits(self.mines.ravel()).tobytes() + bytes(log)
+
+    @classmethod
+    def from_buffer(cls, buffer, offset=0):
+        """
+        Decodes one record from a bytes-like object, such as an mmap.
+
+        Args:
+            buffer: The data.
+            offset (int): Where the record starts.
+
+        Returns:
+            tuple: (GameRecord, offset just past the record).
+        """
+        header = _read_header(buffer, offset)
+        rows, cols = header["rows"], header["cols"]
+        start = offset + HEADER.size
+        bitmap_size = (rows * cols + 7) // 8
+        bits = np.frombuffer(buffer, dtype=np.uint8, count=bitmap_size, offset=start)
+        mines = np.unpackbits(bits)[:rows * cols].astype(bool).reshape(rows, cols)
+
+        log = np.frombuffer(buffer, dtype=np.uint8, count=header["log_size"], offset=start + bitmap_size)
+        values = _decode_varints(log)
+        actions = (values & 3).astype(np.int64)
+        zigzag = (values >> 2).astype(np.int64)
+        indices = np.cumsum((zigzag >> 1) ^ -(zigzag & 1))
+        moves = list(zip(actions.tolist(), (indices // cols).tolist(), (indices % cols).tolist()))
+        record = cls(mines, moves, header["seed"] if header["flags"] & SEEDED else None)
+        return record, start + bitmap_size + header["log_size"]
+
+
+def _write_varint(out, value):
+    # LEB128: seven bits per byte, the high bit set on every byte but the last
+    while value >= 0x80:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _decode_varints(data):
+    # Decodes a whole run of LEB128 varints at once with NumPy
+    if len(data) == 0:
+        return np.zeros(0, dtype=np.uint64)
+    ends = np.flatnonzero(data < 0x80)
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    # Position of every byte inside its varint
+    position = np.arange(len(data)) - np.repeat(starts, ends - starts + 1)
+    parts = (data & 0x7F).astype(np.uint64) << (7 * position).astype(np.uint64)
+    return np.add.reduceat(parts, starts)
+
+
+def _read_header(buffer, offset):
+    magic, version, flags, rows, cols, num_mines, seed, move_count, log_size = HEADER.unpack_from(buffer, offset)
+    if magic != MAGIC:
+        raise ValueError(f"Not a game record at offset {offset}")
+    if version != VERSION:
+        raise ValueError(f"Unsupported game record version {version}")
+    return {"rows": rows, "cols": cols, "num_mines": num_mines, "seed": seed, "flags": flags,
+            "moves": move_count, "log_size": log_size}
+
+
+def save(records, filename, append=True):
+    """
+    Writes records to a file, after the ones already in it unless append is False.
+
+    Args:
+        records (iterable of GameRecord): The games.
+        filename (str): Target file.
+        append (bool): Add to the file instead of replacing it.
+    """
+    with open(filename, "ab" if append else "wb") as file:
+        for record in records:
+            file.write(record.to_bytes())
+
+
+def scan(filename):
+    """
+    Walks the headers of a corpus through mmap, without decoding any bitmap or move log.
+
+    Yields:
+        tuple: (offset, header dict) of every record, in file order.
+    """
+    with open(filename, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        offset = 0
+        while offset < len(data):
+            header = _read_header(data, offset)
+            yield offset, header
+            offset += HEADER.size + (header["rows"] * header["cols"] + 7) // 8 + header["log_size"]
+
+
+def load(filename, offsets=None):
+    """
+    Decodes the records of a corpus.
+
+    Args:
+        filename (str): File written by save().
+        offsets (iterable of int): Only decode the records starting there, as
+            found by scan(). Defaults to every record.
+
+    Returns:
+        list of GameRecord: The games.
+    """
+    with open(filename, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        if offsets is None:
+            offsets = [offset for offset, _ in scan(filename)]
+        return [GameRecord.from_buffer(data, offset)[0] for offset in offsets]
+
+
+def replay(record, mode=None, solve=False):
+    """
+    Re-runs a recorded game headlessly, optionally asking the solver about every intermediate state.
+
+    Args:
+        record (GameRecord): The game.
+        mode (str): AISolver mode used when solve is set.
+        solve (bool): Call AISolver.suggest_moves() after every move, the way
+            the game does with the AI Solver on.
+
+    Returns:
+        dict: Moves played, outcome ("won", "lost" or "unfinished"), replay time
+            and, with solve, the solver latency of every state in seconds.
+    """
+    solver = None
+    latencies = []
+    outcome = "unfinished"
+    start = time.perf_counter()
+    for board, (action, row, col), changed in record.states():
+        if action == REVEAL and board.mines[row, col]:
+            outcome = "lost"
+            break
+        if solve:
+            if solver is None:
+                from AISolver import AISolver  # Only loaded when solving
+
+                solver = AISolver(board, mode=mode or "frontier", num_mines=record.num_mines)
+            solver.update(changed)
+            call_start = time.perf_counter()
+            solver.suggest_moves()
+            latencies.append(time.perf_counter() - call_start)
+        if board.is_won():
+            outcome = "won"
+            break
+    return {"moves": len(record.moves), "outcome": outcome, "duration": time.perf_counter() - start,
+            "latencies": latencies}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect and replay recorded games.")
+    parser.add_argument("filename", help="Game record file, for example games.msr")
+    parser.add_argument("--scan", action="store_true", help="Only list the record headers")
+    parser.add_argument("--solve", action="store_true", help="Time the solver on every intermediate state")
+    parser.add_argument("--mode", default="frontier", help="AISolver mode used with --solve")
+    args = parser.parse_args()
+
+    if args.scan:
+        for offset, header in scan(args.filename):
+            print(f"@{offset}: {header['rows']}x{header['cols']}, {header['num_mines']} mines, {header['moves']} moves")
+        return
+
+    latencies = []
+    outcomes = {}
+    start = time.perf_counter()
+    records = load(args.filename)
+    for record in records:
+        result = replay(record, mode=args.mode, solve=args.solve)
+        outcomes[result["outcome"]] = outcomes.get(result["outcome"], 0) + 1
+        latencies.extend(result["latencies"])
+    elapsed = time.perf_counter() - start
+    moves = sum(len(record.moves) for record in records)
+    print(f"{len(records)} games, {moves} moves replayed in {elapsed:.3f} s ({moves / max(elapsed, 1e-9):.0f} moves/s), "
+          f"outcomes {outcomes}")
+    if latencies:
+        latencies.sort()
+        print(f"solver latency mean/p50/p95/max {1000 * sum(latencies) / len(latencies):.2f}/"
+              f"{1000 * percentile(latencies, 50):.2f}/{1000 * percentile(latencies, 95):.2f}/"
+              f"{1000 * latencies[-1]:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,389 @@
+import argparse
+import csv
+import hashlib
+import json
+import multiprocessing
+import random
+import time
+
+from Board import Board
+from Game import Game
+from AISolver import AISolver
+from Encodings import DEFAULT_ENCODING, ENCODINGS
+from PatternCache import PatternCache
+from Replay import FLAG, REVEAL, GameRecord, save as save_records
+from Profiler import Profiler, percentile
+from Telemetry import Telemetry
+
+
+class Simulator:
+    def __init__(self, rows, cols, num_mines, mode="frontier", telemetry=None, profile=False,
+                 encoding=DEFAULT_ENCODING, pattern_cache=None, record=False):
+        """
+        Plays games headlessly with the AI choosing every move, to benchmark the solver.
+
+        Args:
+            rows (int): Number of rows of the board.
+            cols (int): Number of columns of the board.
+            num_mines (int): Number of mines on the board.
+            mode (str): AISolver mode used to play.
+            telemetry (Telemetry): Optional log receiving the predictions of every move.
+            profile (bool): Record where the solver spends its time, see Profiler.
+            encoding (str): Constraint encoding used by the solver, see Encodings.
+            pattern_cache (str): Optional file the pattern cache is loaded from.
+                Solved patterns are shared by every game this simulator plays.
+            record (bool): Return every game as a Replay.GameRecord, under "record".
+        """
+        self.rows = rows
+        self.cols = cols
+        self.num_mines = num_mines
+        self.mode = mode
+        self.telemetry = telemetry
+        self.profile = profile
+        self.encoding = encoding
+        self.pattern_cache = PatternCache(path=pattern_cache)
+        self.record = record
+        self.game = Game(headless=True)
+
+    def play(self, seed):
+        """
+        Plays one game like a player following the AI: the first click is made
+        in the middle of the board, which is kept free of mines there as in the
+        game, then every turn the proven mines are flagged and one proven safe
+        cell (or the lowest-risk guess) is revealed, and the AI is asked again.
+
+        Args:
+            seed (int): Seed for the board layout.
+
+        Returns:
+            dict: Outcome and timings of the game. "latencies" and "z3_times"
+                hold one entry in seconds per suggest_moves call, "tiers" counts
+                the moves answered by each deduction tier. "cache_hits",
+                "cache_misses" and "cache_saved" (seconds) describe the pattern
+                cache lookups of the game. With profiling on, "phases" and
+                "counts" hold the Profiler totals of the game, with recording on
+                "record" holds the game as a Replay.GameRecord.
+        """
+        first_click = (self.rows // 2, self.cols // 2)
+        grid = self.game.create_grid(self.rows, self.cols, self.num_mines, rng=random.Random(seed),
+                                     safe_cell=first_click)
+        profiler = Profiler() if self.profile else None
+        solver = AISolver(grid, mode=self.mode, num_mines=self.num_mines, profiler=profiler,
+                          encoding=self.encoding, pattern_cache=self.pattern_cache)
+        cache_before = self.pattern_cache.stats()
+        if self.telemetry:
+            self.telemetry.start_game(grid)
+
+        latencies = []
+        z3_times = []
+        moves_played = []  # (action, row, col), for the replay record
+        guesses = 0
+        tiers = {}  # Deduction tier -> number of moves it answered
+        start = time.perf_counter()
+        moves_played.append((REVEAL,) + first_click)
+        solver.update(self.game.reveal_cell(grid, *first_click))
+        safe_left = grid.safe_left()
+        won = safe_left == 0
+        while not won:
+            z3_before = solver.z3_time
+            call_start = time.perf_counter()
+            moves = solver.suggest_moves()
+            latencies.append(time.perf_counter() - call_start)
+            tiers[moves["tier"]] = tiers.get(moves["tier"], 0) + 1
+            z3_times.append(solver.z3_time - z3_before)
+            if self.telemetry:
+                self.telemetry.record(moves["mine_cells"], latencies[-1])
+
+            for r, c in moves["mine_cells"]:
+                grid[r][c]["flagged"] = True
+                moves_played.append((FLAG, r, c))
+            solver.update(moves["mine_cells"])
+            if moves["safe_cells"]:
+                r, c = moves["safe_cells"][0]
+            elif moves["best_guess"] is not None:
+                r, c = moves["best_guess"]
+                guesses += 1
+            else:
+                break
+
+            moves_played.append((REVEAL, r, c))
+            if grid[r][c]["mine"]:
+                break
+            solver.update(self.game.reveal_cell(grid, r, c))
+            safe_left = grid.safe_left()
+            if safe_left == 0:
+                won = True
+                break
+
+        result = {
+            "seed": seed,
+            "won": won,
+            "moves": len(latencies),
+            "guesses": guesses,
+            "tiers": tiers,
+            "safe_left": safe_left,
+            "duration": time.perf_counter() - start,
+            "latencies": latencies,
+            "z3_times": z3_times,
+        }
+        cache = self.pattern_cache.stats()
+        result["cache_hits"] = cache["hits"] - cache_before["hits"]
+        result["cache_misses"] = cache["misses"] - cache_before["misses"]
+        result["cache_saved"] = cache["saved_time"] - cache_before["saved_time"]
+        if self.record:
+            result["record"] = GameRecord(grid.mines, moves_played, seed)
+        if profiler:
+            result["phases"] = {name: seconds for name, seconds in profiler.totals.items() if name != "total"}
+            result["counts"] = dict(profiler.counts)
+        return result
+
+    def run(self, seeds):
+        """
+        Plays one game per seed.
+
+        Args:
+            seeds (iterable of int): Board seeds, one game each.
+
+        Returns:
+            list of dict: The result of every game, see play().
+        """
+        return [self.play(seed) for seed in seeds]
+
+    def stream(self, seeds, workers=None):
+        """
+        Plays one game per seed on a pool of worker processes.
+
+        Every worker builds its own Simulator and warms up Z3 once, then plays
+        the games it is handed. Games only depend on their seed, so the outcome
+        of each game is the same as in a serial run.
+
+        Args:
+            seeds (list of int): Board seeds, one game each.
+            workers (int): Number of processes, defaults to the number of CPUs.
+
+        Yields:
+            tuple: (index into seeds, result) as games finish, in no particular order.
+        """
+        workers = workers or multiprocessing.cpu_count()
+        chunksize = max(1, len(seeds) // (workers * 8))
+        with multiprocessing.Pool(workers, initializer=_init_worker,
+                                  initargs=(self.rows, self.cols, self.num_mines, self.mode, self.profile,
+                                            self.encoding, self.pattern_cache.path, self.record)) as pool:
+            yield from pool.imap_unordered(_play_in_worker, enumerate(seeds), chunksize=chunksize)
+
+    def run_parallel(self, seeds, workers=None):
+        """
+        Same as run(), but spread over worker processes.
+
+        Returns:
+            list of dict: The result of every game, in the order of seeds.
+        """
+        results = [None] * len(seeds)
+        for index, result in self.stream(seeds, workers):
+            results[index] = result
+        return results
+
+
+_worker_simulator = None
+
+
+def _init_worker(rows, cols, num_mines, mode, profile, encoding, pattern_cache, record):
+    # Runs once per worker process: build the simulator and pay the Z3 start-up cost up front
+    global _worker_simulator
+    _worker_simulator = Simulator(rows, cols, num_mines, mode=mode, profile=profile, encoding=encoding,
+                                  pattern_cache=pattern_cache, record=record)
+    from z3 import Bool, Solver
+    warmup = Solver()
+    warmup.add(Bool("warmup"))
+    warmup.check()
+
+
+def _play_in_worker(task):
+    index, seed = task
+    return index, _worker_simulator.play(seed)
+
+
+def derive_seed(master_seed, index):
+    """
+    Derives the seed of one game from the seed of the whole run.
+
+    Hashing keeps the seeds of neighbouring games unrelated and does not
+    depend on how the games are split between processes.
+
+    Args:
+        master_seed (int): Seed of the run.
+        index (int): Position of the game in the run.
+
+    Returns:
+        int: A 64-bit seed for the game.
+    """
+    digest = hashlib.sha256(f"{master_seed}:{index}".encode()).digest()
+    return int.from_bytes(digest[:8], "little")
+
+
+def summarize(results):
+    """
+    Aggregates game results into the numbers used to compare solver changes.
+
+    Args:
+        results (list of dict): Results returned by Simulator.play().
+
+    Returns:
+        dict: Win rate, latency percentiles, Z3 time per move, share of moves
+            answered by each deduction tier and pattern cache hit rate and time
+            saved per move, times in milliseconds. Profiled results add the mean time of every solver
+            phase and the mean of every counter per move.
+    """
+    latencies = sorted(latency for result in results for latency in result["latencies"])
+    z3_total = sum(z3 for result in results for z3 in result["z3_times"])
+    moves = len(latencies)
+    summary = {
+        "games": len(results),
+        "wins": sum(result["won"] for result in results),
+        "win_rate": sum(result["won"] for result in results) / len(results) if results else 0.0,
+        "moves": moves,
+        "latency_mean_ms": 1000 * sum(latencies) / moves if moves else 0.0,
+        "latency_p50_ms": 1000 * percentile(latencies, 50),
+        "latency_p95_ms": 1000 * percentile(latencies, 95),
+        "latency_p99_ms": 1000 * percentile(latencies, 99),
+        "z3_ms_per_move": 1000 * z3_total / moves if moves else 0.0,
+    }
+    tiers = {}
+    for result in results:
+        for tier, count in result.get("tiers", {}).items():
+            tiers[tier] = tiers.get(tier, 0) + count
+    summary["tiers"] = {tier: count / moves for tier, count in sorted(tiers.items())}
+    hits = sum(result.get("cache_hits", 0) for result in results)
+    lookups = hits + sum(result.get("cache_misses", 0) for result in results)
+    summary["cache_hit_rate"] = hits / lookups if lookups else 0.0
+    summary["cache_saved_ms_per_move"] = (
+        1000 * sum(result.get("cache_saved", 0.0) for result in results) / moves if moves else 0.0
+    )
+    if moves and any("phases" in result for result in results):
+        phases, counts = {}, {}
+        for result in results:
+            for name, seconds in result.get("phases", {}).items():
+                phases[name] = phases.get(name, 0.0) + seconds
+            for name, value in result.get("counts", {}).items():
+                counts[name] = counts.get(name, 0) + value
+        summary["phases_ms_per_move"] = {name: 1000 * seconds / moves for name, seconds in sorted(phases.items())}
+        summary["counts_per_move"] = {name: value / moves for name, value in sorted(counts.items())}
+    return summary
+
+
+def benchmark_generation(sizes=((100, 100), (1000, 1000), (2000, 2000)), density=0.2, repeats=3, no_guess_games=10,
+                         seed=0):
+    """
+    Measures how fast boards are generated.
+
+    Args:
+        sizes (iterable of tuple): (rows, cols) of the random boards to time.
+        density (float): Mine density of those boards.
+        repeats (int): Boards built per size, the best time is kept.
+        no_guess_games (int): No-guess boards built per difficulty.
+        seed (int): Seed of the boards.
+
+    Returns:
+        dict: For every size the best time in milliseconds and the cells built
+            per second, and for every difficulty the mean time of a no-guess board.
+    """
+    rng = random.Random(seed)
+    results = {}
+    for rows, cols in sizes:
+        best = min(_timed(Board.create, rows, cols, None, rng, density, (rows // 2, cols // 2)) for _ in range(repeats))
+        results[f"{rows}x{cols}"] = {"ms": 1000 * best, "cells_per_s": rows * cols / best}
+    for difficulty, (rows, cols, num_mines) in Game.DIFFICULTIES.items():
+        total = sum(_timed(Board.create_no_guess, rows, cols, num_mines, rng) for _ in range(no_guess_games))
+        results[f"no-guess {difficulty}"] = {"ms": 1000 * total / no_guess_games}
+    return results
+
+
+def _timed(function, *args):
+    # Seconds one call takes
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+
+def write_csv(results, filename):
+    # One row per game, without the per-move lists
+    fields = ["difficulty", "seed", "won", "moves", "guesses", "safe_left", "duration"]
+    with open(filename, "w", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=fields, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the AI solver on headless games.")
+    parser.add_argument("--difficulty", choices=sorted(Game.DIFFICULTIES), action="append",
+                        help="Difficulty to play, can be repeated (default: all)")
+    parser.add_argument("--games", type=int, default=100, help="Games per difficulty")
+    parser.add_argument("--seed", type=int, default=0, help="Master seed, every game derives its own seed from it")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes, 0 for one per CPU")
+    parser.add_argument("--mode", choices=AISolver.MODES, default="frontier", help="AISolver mode")
+    parser.add_argument("--encoding", choices=sorted(ENCODINGS), default=DEFAULT_ENCODING,
+                        help="How number constraints are encoded for Z3")
+    parser.add_argument("--pattern-cache", help="Load solved patterns from this file, serial runs save them back")
+    parser.add_argument("--generation", action="store_true", help="Also time board generation")
+    parser.add_argument("--json", help="Write the summaries to this JSON file")
+    parser.add_argument("--csv", help="Write per-game results to this CSV file")
+    parser.add_argument("--telemetry", help="Append per-move accuracy records to this log (serial runs only)")
+    parser.add_argument("--profile", action="store_true", help="Break the solver time down by phase")
+    parser.add_argument("--record", help="Append every game to this replay file, see Replay.py")
+    args = parser.parse_args()
+    if args.telemetry and args.workers != 1:
+        parser.error("--telemetry needs --workers 1, the log is written by a single process")
+    telemetry = Telemetry(args.telemetry) if args.telemetry else None
+
+    summaries = {}
+    all_results = []
+    for difficulty in args.difficulty or list(Game.DIFFICULTIES):
+        rows, cols, num_mines = Game.DIFFICULTIES[difficulty]
+        simulator = Simulator(rows, cols, num_mines, mode=args.mode, telemetry=telemetry, profile=args.profile,
+                              encoding=args.encoding, pattern_cache=args.pattern_cache, record=bool(args.record))
+        seeds = [derive_seed(args.seed, index) for index in range(args.games)]
+        if args.workers == 1:
+            results = simulator.run(seeds)
+        else:
+            results = simulator.run_parallel(seeds, workers=args.workers or None)
+        summaries[difficulty] = summarize(results)
+        if args.record:
+            save_records([result.pop("record") for result in results], args.record)
+        all_results.extend(dict(result, difficulty=difficulty) for result in results)
+
+        summary = summaries[difficulty]
+        print(f"{difficulty}: win rate {summary['win_rate']:.3f}, "
+              f"latency mean/p50/p95/p99 {summary['latency_mean_ms']:.2f}/{summary['latency_p50_ms']:.2f}/"
+              f"{summary['latency_p95_ms']:.2f}/{summary['latency_p99_ms']:.2f} ms, "
+              f"Z3 {summary['z3_ms_per_move']:.2f} ms/move, "
+              f"pattern cache hit rate {summary['cache_hit_rate']:.3f} "
+              f"({summary['cache_saved_ms_per_move']:.2f} ms/move saved)")
+        print("  moves by tier: " + ", ".join(f"{tier} {share:.1%}" for tier, share in summary["tiers"].items()))
+        if args.pattern_cache and args.workers == 1:
+            simulator.pattern_cache.save()
+        if "phases_ms_per_move" in summary:
+            print("  phases (ms/move): " + ", ".join(
+                f"{name} {ms:.3f}" for name, ms in summary["phases_ms_per_move"].items()))
+            print("  per move: " + ", ".join(
+                f"{name} {value:.1f}" for name, value in summary["counts_per_move"].items()))
+
+    generation = None
+    if args.generation:
+        generation = benchmark_generation(seed=args.seed)
+        for name, timing in generation.items():
+            rate = f", {timing['cells_per_s'] / 1e6:.1f}M cells/s" if "cells_per_s" in timing else ""
+            print(f"generation {name}: {timing['ms']:.2f} ms{rate}")
+
+    if telemetry:
+        telemetry.close()
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump({"mode": args.mode, "encoding": args.encoding, "seed": args.seed, "games": args.games, "workers": args.workers,
+                       "summaries": summaries, "generation": generation}, file, indent=2)
+    if args.csv:
+        write_csv(all_results, args.csv)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,544 @@
+import argparse
+import asyncio
+import random
+import struct
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+from Board import Board, REVEALED, FLAGGED
+from Profiler import percentile
+
+# Every message is a little-endian length followed by the payload
+FRAME = struct.Struct("<I")
+# Request: id, session, operation, rows, cols, mines (NO_MINE_COUNT if unknown), then the packed cells
+REQUEST = struct.Struct("<IIBIII")
+# Response: id, status, then the body of the operation, or an error message
+RESPONSE = struct.Struct("<IB")
+# Body of a SUGGEST response: solve seconds, tier, safe cells, mine cells, best guess (-1 for none),
+# followed by the cell indices of the safe cells and of the mine cells
+SUGGESTION = struct.Struct("<dBIIi")
+
+# Operations
+SUGGEST = 1  # AISolver.suggest_moves()
+PROBABILITIES = 2  # AISolver.mine_probabilities(), answered as one float32 per cell, NaN on revealed cells
+CLOSE = 3  # Forget the session
+
+OK = 0
+ERROR = 1
+
+NO_MINE_COUNT = 0xFFFFFFFF
+TIERS = (None, "local", "pairwise", "cache", "z3")
+
+# Cells travel as one 4-bit code each, two per byte: the number of a revealed cell, or one of these
+HIDDEN = 9
+FLAG = 10
+REVEALED_MINE = 11
+
+
+def encode_state(board):
+    """
+    Packs what a player can see of a board into half a byte per cell.
+
+    Hidden mines are not part of it, the solver never needs them.
+
+    Args:
+        board (Board): The board.
+
+    Returns:
+        bytes: ceil(rows * cols / 2) bytes.
+    """
+    codes = np.where(board.revealed, np.where(board.mines, REVEALED_MINE, board.numbers),
+                     np.where(board.flagged, FLAG, HIDDEN)).astype(np.uint8).ravel()
+    if codes.size % 2:
+        codes = np.append(codes, np.uint8(HIDDEN))
+    return (codes[0::2] << 4 | codes[1::2]).tobytes()
+
+
+def decode_state(data, rows, cols):
+    """
+    Unpacks the cell codes written by encode_state().
+
+    Returns:
+        numpy.ndarray: 2D uint8 array of cell codes.
+    """
+    packed = np.frombuffer(data, dtype=np.uint8)
+    codes = np.empty(packed.size * 2, dtype=np.uint8)
+    codes[0::2] = packed >> 4
+    codes[1::2] = packed & 0x0F
+    return codes[:rows * cols].reshape(rows, cols)
+
+
+def _board(codes):
+    # Rebuilds a board from cell codes, with no mine except the revealed ones
+    revealed = (codes <= 8) | (codes == REVEALED_MINE)
+    state = np.where(revealed, REVEALED, np.where(codes == FLAG, FLAGGED, 0))
+    return Board.from_arrays(codes == REVEALED_MINE, np.where(codes <= 8, codes, 0), state)
+
+
+class _Session:
+    # Solver state a worker keeps for one client board between requests
+    __slots__ = ("solver", "codes", "results")
+
+    def __init__(self, solver, codes):
+        self.solver = solver
+        self.codes = codes
+        self.results = {}  # Operation -> body answered for the current codes
+
+
+_sessions = None  # Per worker process: session key -> _Session, least recently used first
+_pattern_cache = None
+_max_sessions = 0
+_mode = None
+
+
+def _init_worker(max_sessions, mode):
+    # Runs once per worker process: session table, pattern cache, and the Z3 start-up cost
+    global _sessions, _pattern_cache, _max_sessions, _mode
+    from AISolver import _import_z3
+    from PatternCache import PatternCache
+
+    _sessions = OrderedDict()
+    _pattern_cache = PatternCache()
+    _max_sessions = max_sessions
+    _mode = mode
+    z3 = _import_z3()
+    warmup = z3.Solver()
+    warmup.add(z3.Bool("warmup"))
+    warmup.check()
+
+
+def _solve_batch(batch):
+    # Answers a batch of requests in order, one (status, body) each
+    results = []
+    for request in batch:
+        try:
+            results.append((OK, _solve(*request)))
+        except Exception as error:
+            results.append((ERROR, f"{type(error).__name__}: {error}".encode()))
+    return results
+
+
+def _solve(key, operation, rows, cols, num_mines, data):
+    """
+    Answers one request, reusing the session's solver when the board only moved forward.
+
+    The solver of a session is kept between requests and only told which cells
+    changed, so in incremental mode its Z3 problem is kept and only the new
+    constraints are added. A board on which a revealed cell became hidden
+    again, or with another size or mine count, is a new game and gets a new solver.
+    """
+    from AISolver import AISolver
+
+    if operation == CLOSE:
+        _sessions.pop(key, None)
+        return b""
+    if operation not in (SUGGEST, PROBABILITIES):
+        raise ValueError(f"Unknown operation: {operation}")
+    num_mines = None if num_mines == NO_MINE_COUNT else num_mines
+    codes = decode_state(data, rows, cols)
+    session = _sessions.get(key)
+    if (session is None or session.codes.shape != codes.shape or session.solver.num_mines != num_mines
+            or ((session.codes != HIDDEN) & (session.codes != FLAG) & ((codes == HIDDEN) | (codes == FLAG))).any()):
+        session = _Session(AISolver(_board(codes), mode=_mode, num_mines=num_mines, pattern_cache=_pattern_cache),
+                           codes)
+        _sessions[key] = session
+        while len(_sessions) > _max_sessions:
+            _sessions.popitem(last=False)
+    else:
+        _sessions.move_to_end(key)
+        changed = np.flatnonzero(codes != session.codes)
+        if not changed.size and operation in session.results:
+            return session.results[operation]  # Asked again about the same board
+        if changed.size:
+            session.solver.grid = _board(codes)
+            session.solver.update(zip((changed // cols).tolist(), (changed % cols).tolist()))
+            session.codes = codes
+            session.results = {}
+
+    start = time.perf_counter()
+    if operation == SUGGEST:
+        moves = session.solver.suggest_moves()
+        guess = moves["best_guess"]
+        body = SUGGESTION.pack(time.perf_counter() - start, TIERS.index(moves["tier"]), len(moves["safe_cells"]),
+                               len(moves["mine_cells"]), -1 if guess is None else guess[0] * cols + guess[1])
+        cells = [r * cols + c for r, c in moves["safe_cells"] + moves["mine_cells"]]
+        body += np.array(cells, dtype="<u4").tobytes()
+    else:
+        probabilities = np.full(rows * cols, np.nan, dtype="<f4")
+        for (r, c), probability in session.solver.mine_probabilities().items():
+            probabilities[r * cols + c] = probability
+        body = probabilities.tobytes()
+    session.results[operation] = body
+    return body
+
+
+class SolverService:
+    def __init__(self, workers=None, mode="frontier", max_batch=64, max_sessions=1024):
+        """
+        Serves the AI solver to many boards at once from a pool of warm worker processes.
+
+        Clients send the visible state of their board, four bits per cell, and
+        get the answer of suggest_moves() or mine_probabilities() back. Each
+        client board is a session, and every session always goes to the same
+        worker, which keeps its solver between requests (see _solve), so a
+        session pays for its new constraints only. Requests waiting for a busy
+        worker are sent to it together as one batch once it is free, which
+        keeps the cost of crossing the process boundary per batch rather than
+        per request under load.
+
+        Args:
+            workers (int): Worker processes, defaults to the number of CPUs.
+            mode (str): AISolver mode of the sessions. The frontier mode shares
+                its solved patterns between every session of a worker, which
+                pays off more than a Z3 problem kept per board.
+            max_batch (int): Most requests handed to a worker at once.
+            max_sessions (int): Sessions each worker keeps, the least recently
+                used are dropped beyond it and start over on their next request.
+        """
+        import os
+
+        self.workers = workers or os.cpu_count()
+        self.mode = mode
+        self.max_batch = max_batch
+        self.max_sessions = max_sessions
+        self.requests = 0
+        self.batches = 0
+        self._executors = []
+        self._queues = []
+        self._dispatchers = []
+        self._connections = 0
+        self._handlers = {}  # Task serving a connection -> its writer
+        self._server = None
+
+    async def start(self, path=None, host="127.0.0.1", port=0):
+        """
+        Starts the worker pool and listens on a Unix socket, or on a TCP port without a path.
+
+        Returns:
+            asyncio.AbstractServer: The listening server.
+        """
+        self._executors = [self._new_executor() for _ in range(self.workers)]
+        self._queues = [asyncio.Queue() for _ in range(self.workers)]
+        self._dispatchers = [asyncio.create_task(self._dispatch(index)) for index in range(self.workers)]
+        if path:
+            self._server = await asyncio.start_unix_server(self._handle, path)
+        else:
+            self._server = await asyncio.start_server(self._handle, host, port)
+        return self._server
+
+    async def close(self):
+        # Stops listening, ends the open connections, then stops the dispatchers and the worker processes
+        if self._server is not None:
+            self._server.close()
+        for writer in self._handlers.values():
+            writer.close()
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+        for task in self._dispatchers:
+            task.cancel()
+        for executor in self._executors:
+            executor.shutdown(cancel_futures=True)
+
+    def _new_executor(self):
+        # One process per executor, so the sessions hashed to it always find their solver there
+        return ProcessPoolExecutor(1, initializer=_init_worker, initargs=(self.max_sessions, self.mode))
+
+    def stats(self):
+        """
+        Returns:
+            dict: Requests answered, batches sent to the workers and the mean batch size.
+        """
+        return {"requests": self.requests, "batches": self.batches,
+                "mean_batch": self.requests / self.batches if self.batches else 0.0}
+
+    async def _handle(self, reader, writer):
+        # Reads the requests of one connection; answers are written as they finish, in any order
+        self._connections += 1
+        connection = self._connections
+        self._handlers[asyncio.current_task()] = writer
+        sessions = set()
+        pending = set()
+        try:
+            while True:
+                try:
+                    size, = FRAME.unpack(await reader.readexactly(FRAME.size))
+                    payload = await reader.readexactly(size)
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                request_id, session, operation, rows, cols, num_mines = REQUEST.unpack_from(payload)
+                sessions.add(session)
+                task = asyncio.create_task(self._answer(
+                    writer, request_id, (connection, session),
+                    (operation, rows, cols, num_mines, payload[REQUEST.size:])))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+        finally:
+            await asyncio.gather(*pending, return_exceptions=True)
+            # The sessions of a closed connection can never be asked about again
+            for session in sessions:
+                self._submit((connection, session), (CLOSE, 0, 0, 0, b""))
+            writer.close()
+            del self._handlers[asyncio.current_task()]
+
+    def _submit(self, key, request):
+        # Queues a request for the worker owning the session
+        future = asyncio.get_running_loop().create_future()
+        self._queues[hash(key) % self.workers].put_nowait(((key,) + request, future))
+        return future
+
+    async def _answer(self, writer, request_id, key, request):
+        status, body = await self._submit(key, request)
+        if not writer.is_closing():
+            writer.write(FRAME.pack(RESPONSE.size + len(body)) + RESPONSE.pack(request_id, status) + body)
+
+    async def _dispatch(self, index):
+        # Feeds one worker: everything queued while it was busy goes out as the next batch
+        loop = asyncio.get_running_loop()
+        queue = self._queues[index]
+        while True:
+            batch = [await queue.get()]
+            while len(batch) < self.max_batch and not queue.empty():
+                batch.append(queue.get_nowait())
+            try:
+                results = await loop.run_in_executor(self._executors[index], _solve_batch,
+                                                     [request for request, _ in batch])
+            except BrokenProcessPool as error:
+                # The worker process died, a new one takes its sessions, which start over on their next request
+                self._executors[index].shutdown(wait=False, cancel_futures=True)
+                self._executors[index] = self._new_executor()
+                results = [(ERROR, f"{type(error).__name__}: {error}".encode())] * len(batch)
+            except Exception as error:
+                results = [(ERROR, f"{type(error).__name__}: {error}".encode())] * len(batch)
+            self.requests += len(batch)
+            self.batches += 1
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+
+class SolverClient:
+    def __init__(self, reader, writer):
+        """
+        Connection to a SolverService. Requests can be sent concurrently from
+        many tasks and are answered as soon as their solve finishes.
+
+        Use SolverClient.connect() to open one.
+        """
+        self._reader = reader
+        self._writer = writer
+        self._next_id = 0
+        self._waiting = {}  # Request id -> future of its response
+        self._receiver = asyncio.create_task(self._receive())
+
+    @classmethod
+    async def connect(cls, path=None, host="127.0.0.1", port=None):
+        """
+        Connects to a service on a Unix socket, or on a TCP port without a path.
+
+        Returns:
+            SolverClient: The connection.
+        """
+        if path:
+            reader, writer = await asyncio.open_unix_connection(path)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def suggest(self, session, board, num_mines=None):
+        """
+        Asks for the moves AISolver.suggest_moves() would suggest.
+
+        Args:
+            session (int): Id of the board, chosen by the client. Asking again
+                about the same session lets the service reuse its solver.
+            board (Board): The board, only what a player sees of it is sent.
+            num_mines (int): Total number of mines, enables the best guess.
+
+        Returns:
+            dict: suggest_moves() output plus "solve_time", the seconds the
+                solver took in the service.
+        """
+        body = await self._request(SUGGEST, session, board, num_mines)
+        solve_time, tier, safe_count, mine_count, guess = SUGGESTION.unpack_from(body)
+        cells = np.frombuffer(body, dtype="<u4", offset=SUGGESTION.size)
+        cols = board.cols
+        coordinates = [(int(index) // cols, int(index) % cols) for index in cells]
+        return {
+            "safe_cells": coordinates[:safe_count],
+            "mine_cells": coordinates[safe_count:safe_count + mine_count],
+            "best_guess": None if guess < 0 else (guess // cols, guess % cols),
+            "tier": TIERS[tier],
+            "solve_time": solve_time,
+        }
+
+    async def probabilities(self, session, board, num_mines):
+        """
+        Asks for AISolver.mine_probabilities().
+
+        Returns:
+            dict: Maps the coordinates of every unrevealed cell to its mine probability.
+        """
+        body = await self._request(PROBABILITIES, session, board, num_mines)
+        values = np.frombuffer(body, dtype="<f4").reshape(board.rows, board.cols)
+        return {(int(r), int(c)): float(values[r, c]) for r, c in zip(*np.nonzero(~np.isnan(values)))}
+
+    async def close_session(self, session):
+        # Lets the service drop the solver of a board that is finished
+        self._send(CLOSE, session, 0, 0, NO_MINE_COUNT, b"")
+
+    async def close(self):
+        self._writer.close()
+        await self._writer.wait_closed()
+        self._receiver.cancel()
+
+    async def _request(self, operation, session, board, num_mines):
+        future = self._send(operation, session, board.rows, board.cols,
+                            NO_MINE_COUNT if num_mines is None else num_mines, encode_state(board))
+        status, body = await future
+        if status != OK:
+            raise RuntimeError(f"Solver service error: {body.decode()}")
+        return body
+
+    def _send(self, operation, session, rows, cols, num_mines, data):
+        self._next_id = (self._next_id + 1) % 2 ** 32
+        future = asyncio.get_running_loop().create_future()
+        self._waiting[self._next_id] = future
+        payload = REQUEST.pack(self._next_id, session, operation, rows, cols, num_mines) + data
+        self._writer.write(FRAME.pack(len(payload)) + payload)
+        return future
+
+    async def _receive(self):
+        # Hands every response to the request waiting for it
+        try:
+            while True:
+                size, = FRAME.unpack(await self._reader.readexactly(FRAME.size))
+                payload = await self._reader.readexactly(size)
+                request_id, status = RESPONSE.unpack_from(payload)
+                future = self._waiting.pop(request_id, None)
+                if future is not None and not future.done():
+                    future.set_result((status, payload[RESPONSE.size:]))
+        except (asyncio.IncompleteReadError, ConnectionError) as error:
+            for future in self._waiting.values():
+                if not future.done():
+                    future.set_exception(ConnectionError(f"Solver service closed the connection: {error}"))
+            self._waiting.clear()
+
+
+async def _play(client, session, rows, cols, num_mines, rng, deadline, latencies):
+    # One simulated player: plays games through the service until the deadline, timing every request
+    games = 0
+    while time.perf_counter() < deadline:
+        first = (rng.randrange(rows), rng.randrange(cols))
+        board = Board.create(rows, cols, num_mines, rng=rng, safe_cell=first)
+        board.reveal(*first)
+        games += 1
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            moves = await client.suggest(session, board, num_mines)
+            latencies.append(time.perf_counter() - start)
+            for cell in moves["mine_cells"]:
+                board.set_flagged(*cell)
+            cells = moves["safe_cells"] or ([moves["best_guess"]] if moves["best_guess"] is not None else [])
+            if not cells or any(board.mines[cell] for cell in cells):
+                break
+            for cell in cells:
+                board.reveal(*cell)
+            if board.is_won():
+                break
+    return games
+
+
+async def run_load(path=None, host="127.0.0.1", port=None, clients=16, connections=4, seconds=10.0,
+                   difficulty="hard", seed=0):
+    """
+    Drives a running service with simulated players and measures it.
+
+    Every player plays games on its own board, one session each, and sends a
+    suggest request after every move, as the game does with the AI Solver on.
+
+    Args:
+        path, host, port: Where the service listens, as in SolverClient.connect().
+        clients (int): Concurrent players.
+        connections (int): Connections the players are spread over.
+        seconds (float): Length of the run.
+        difficulty (str): Board preset from Game.DIFFICULTIES.
+        seed (int): Seed of the boards.
+
+    Returns:
+        dict: Requests, games, requests per second and latency percentiles in milliseconds.
+    """
+    from Game import Game
+
+    rows, cols, num_mines = Game.DIFFICULTIES[difficulty]
+    links = [await SolverClient.connect(path, host, port) for _ in range(connections)]
+    latencies = []
+    start = time.perf_counter()
+    games = await asyncio.gather(*(
+        _play(links[index % connections], index, rows, cols, num_mines, random.Random(f"{seed}:{index}"),
+              start + seconds, latencies)
+        for index in range(clients)
+    ))
+    elapsed = time.perf_counter() - start
+    for link in links:
+        await link.close()
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "games": sum(games),
+        "requests_per_s": len(latencies) / elapsed,
+        "latency_mean_ms": 1000 * sum(latencies) / len(latencies) if latencies else 0.0,
+        "latency_p50_ms": 1000 * percentile(latencies, 50),
+        "latency_p95_ms": 1000 * percentile(latencies, 95),
+        "latency_p99_ms": 1000 * percentile(latencies, 99),
+        "latency_max_ms": 1000 * latencies[-1] if latencies else 0.0,
+    }
+
+
+async def _serve(args):
+    service = SolverService(args.workers or None, args.mode, args.max_batch, args.max_sessions)
+    server = await service.start(args.socket, args.host, args.port)
+    where = args.socket or ":".join(str(part) for part in server.sockets[0].getsockname()[:2])
+    print(f"Solver service on {where} with {service.workers} workers")
+    try:
+        await server.serve_forever()
+    finally:
+        print(service.stats())
+        await service.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the AI solver to many boards, or load-test the service.")
+    parser.add_argument("command", choices=("serve", "load"))
+    parser.add_argument("--socket", help="Unix socket path, instead of TCP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=0, help="serve: worker processes, 0 for one per CPU")
+    parser.add_argument("--mode", default="frontier", help="serve: AISolver mode of the sessions")
+    parser.add_argument("--max-batch", type=int, default=64, help="serve: most requests sent to a worker at once")
+    parser.add_argument("--max-sessions", type=int, default=1024, help="serve: sessions kept per worker")
+    parser.add_argument("--clients", type=int, default=16, help="load: concurrent simulated players")
+    parser.add_argument("--connections", type=int, default=4, help="load: connections shared by the players")
+    parser.add_argument("--seconds", type=float, default=10.0, help="load: length of the run")
+    parser.add_argument("--difficulty", default="hard", help="load: board preset")
+    parser.add_argument("--seed", type=int, default=0, help="load: seed of the boards")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        try:
+            asyncio.run(_serve(args))
+        except KeyboardInterrupt:
+            pass
+        return
+    report = asyncio.run(run_load(args.socket, args.host, args.port, args.clients, args.connections, args.seconds,
+                                  args.difficulty, args.seed))
+    print(f"{report['requests']} requests, {report['games']} games, {report['requests_per_s']:.0f} req/s, "
+          f"latency mean/p50/p95/p99/max {report['latency_mean_ms']:.2f}/{report['latency_p50_ms']:.2f}/"
+          f"{report['latency_p95_ms']:.2f}/{report['latency_p99_ms']:.2f}/{report['latency_max_ms']:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
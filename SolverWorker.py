@@ -0,0 +1,194 @@
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import traceback
+
+from AISolver import AISolver, SolverInterrupted
+
+STOP_TIMEOUT = 0.1  # Seconds stop() waits for the solver process before terminating it
+NICENESS = 10  # Scheduling priority given up by the solver process, so on a busy core the game loop runs first
+
+
+class SolverWorker:
+    def __init__(self, board, mode="incremental", num_mines=None, pattern_cache=None):
+        """
+        Runs the AI solver in a separate process so the game loop never waits for it.
+
+        A thread is not enough: building the frontier, the pairwise rules and
+        the solution counts are pure Python, and while they run the game loop
+        has to wait for the interpreter lock at every frame. The solver process
+        keeps one AISolver for the whole game, so the incremental mode keeps
+        its Z3 state between requests.
+
+        The game loop submits board states and polls for results once per
+        frame. Only the newest request matters: submitting a new state
+        interrupts the solve in flight and drops any older request still
+        queued, and results of outdated requests are never delivered. A solve
+        that fails, or a solver process that dies, is answered with an empty
+        result carrying an "error", so the game never waits on it.
+
+        Args:
+            board (Board): The game board, copied on every submit.
+            mode (str): AISolver mode.
+            num_mines (int): Total number of mines, enables probabilities and guesses.
+            pattern_cache (PatternCache): Optional cache shared with other solvers.
+                The solver process works on a copy and sends back what it adds,
+                which is merged in here on every poll().
+        """
+        self.pattern_cache = pattern_cache
+        self._generation = 0  # Number of the newest request
+        self._done = 0  # Number of the newest request that finished
+        requests, self._requests = multiprocessing.Pipe(duplex=False)
+        self._results, results = multiprocessing.Pipe(duplex=False)
+        self._process = multiprocessing.Process(
+            target=_serve, args=(requests, results, board.copy(), mode, num_mines, pattern_cache),
+            name="SolverWorker", daemon=True,
+        )
+        self._process.start()
+        requests.close()  # Only the solver process uses these ends, so its exit shows up as EOF here
+        results.close()
+
+    @property
+    def busy(self):
+        """
+        True while the newest request has not been answered yet.
+        """
+        return self._done < self._generation
+
+    def submit(self, board, changed=None, probabilities=True):
+        """
+        Requests a solve of the current board state.
+
+        Args:
+            board (Board): The game board, sent as it is now so the game can keep changing it.
+            changed (iterable of tuples): Cells changed since the last submit, or
+                None to let the solver rescan the board.
+            probabilities (bool): Also compute the mine probabilities of every
+                cell, for the overlay. Those of a guess are always included.
+        """
+        self._generation += 1
+        try:
+            self._requests.send((self._generation, board, None if changed is None else list(changed), probabilities))
+        except OSError:
+            pass  # The solver process is gone, poll() answers for it
+
+    def poll(self):
+        """
+        Returns the newest finished result, if any arrived since the last poll.
+
+        Returns:
+            dict: suggest_moves() output plus "probabilities" and "solve_time"
+                (seconds), and "error" if the solve failed, or None.
+        """
+        result = None
+        while True:
+            try:
+                if not self._results.poll():
+                    return result
+                generation, moves = self._results.recv()
+            except (EOFError, OSError):
+                if not self.busy:
+                    return result
+                self._done = self._generation
+                return _empty_result("The solver process exited")
+            entries = moves.pop("patterns", None)
+            if entries and self.pattern_cache is not None:
+                self.pattern_cache.merge(entries)
+            if generation == self._generation:
+                self._done = generation
+                result = moves
+
+    def stop(self):
+        # Ends the solver process, a solve in flight is interrupted
+        try:
+            self._requests.send(None)
+        except OSError:
+            pass
+        self._process.join(STOP_TIMEOUT)
+        if self._process.is_alive():
+            self._process.terminate()  # Still inside one long Z3 check
+        self._requests.close()
+        self._results.close()
+
+
+def _empty_result(error):
+    # What a failed solve is answered with: nothing proven, nothing to guess
+    return {"safe_cells": [], "mine_cells": [], "best_guess": None, "tier": None, "probabilities": {},
+            "solve_time": 0.0, "error": error}
+
+
+def _serve(requests, results, board, mode, num_mines, pattern_cache):
+    # Body of the solver process: this thread receives requests and interrupts outdated solves,
+    # a second one solves the newest request
+    if hasattr(os, "nice"):
+        os.nice(NICENESS)
+    solver = AISolver(board, mode=mode, num_mines=num_mines, pattern_cache=pattern_cache)
+    if pattern_cache is not None:
+        solver.pattern_cache.journal = []  # New entries go back to the game with the results
+    pending = queue.Queue()
+    thread = threading.Thread(target=_solve_requests, args=(solver, pending, results), daemon=True)
+    thread.start()
+    while True:
+        try:
+            request = requests.recv()
+        except EOFError:
+            request = None  # The game process is gone
+        pending.put(request)
+        solver.interrupt()  # Whatever is running is out of date now
+        if request is None:
+            thread.join()
+            return
+
+
+def _solve_requests(solver, pending, results):
+    pending_changes = set()
+    rescan = False
+    while True:
+        request = pending.get()
+        # Skip to the newest request, keeping track of every change it implies
+        while True:
+            if request is None:
+                return
+            generation, board, changed, probabilities = request
+            if changed is None:
+                rescan = True
+            else:
+                pending_changes.update(changed)
+            try:
+                request = pending.get_nowait()
+            except queue.Empty:
+                break
+
+        solver.clear_interrupt()
+        if not pending.empty():
+            solver.interrupt()  # A newer request slipped in, go straight to it
+        solver.grid = board
+        solver.update(None if rescan else pending_changes)
+        start = time.perf_counter()
+        try:
+            moves = solver.suggest_moves()
+            if not probabilities or solver.num_mines is None:
+                moves["probabilities"] = {}
+            elif solver.probabilities is not None:
+                moves["probabilities"] = solver.probabilities  # Already computed for the guess
+            else:
+                moves["probabilities"] = solver.mine_probabilities()
+            rescan = False
+        except SolverInterrupted:
+            continue  # The changes stay pending for the next request
+        except Exception as error:
+            traceback.print_exc()
+            moves = _empty_result(repr(error))
+            rescan = True  # The solver may have stopped halfway through an update
+        moves["solve_time"] = time.perf_counter() - start
+        pending_changes = set()
+        journal = solver.pattern_cache.journal
+        if journal:
+            moves["patterns"] = list(journal)
+            journal.clear()
+        try:
+            results.send((generation, moves))
+        except OSError:
+            return  # The game process is gone
@@ -0,0 +1,222 @@
+import os
+import struct
+import sys
+import time
+import uuid
+
+import numpy as np
+
+from Profiler import percentile
+
+MAGIC = b"MSTL"
+VERSION = 2  # Version 1 logs had 16-bit board sizes and no header
+# Written once at the start of a log: magic, version, size of one record
+HEADER = struct.Struct("<4sBxxxI")
+
+# One fixed-size little-endian record per solver update, appended to the log as is
+RECORD = np.dtype([
+    ("game", "<u8"),        # Random id of the game
+    ("move", "<u4"),        # Number of the update within the game
+    ("timestamp", "<f8"),   # Unix time of the update
+    ("solve_ms", "<f4"),    # Time the solver took for this update
+    ("rows", "<u4"),        # Generated boards can be larger than 65535 cells a side
+    ("cols", "<u4"),
+    ("predicted", "<u4"),   # Cells predicted to be mines
+    ("tp", "<u4"),          # Predicted cells that are mines
+    ("fp", "<u4"),          # Predicted cells that are not mines
+    ("fn", "<u4"),          # Mines that are not predicted
+])
+
+
+class Telemetry:
+    def __init__(self, filename="accuracy_log.bin", buffer_size=1024):
+        """
+        Records how accurate the AI's mine predictions are, move by move.
+
+        The mine set is computed once per game, and the true/false positive
+        and false negative counts are updated from the cells whose prediction
+        changed only. Records are kept in memory and appended to a binary log
+        in batches, instead of reopening a text file on every click. The log
+        starts with a HEADER naming its version; a log in another format is
+        moved aside to `<filename>.old` rather than appended to, so records of
+        different layouts never end up in the same file.
+
+        Args:
+            filename (str): Log file, records are appended to it.
+            buffer_size (int): Number of records kept in memory before a flush.
+        """
+        self.filename = filename
+        self.buffer_size = buffer_size
+        self._buffer = []
+        self._checked = False  # Whether the header of an existing log was verified
+        self.game_id = None
+        self.rows = self.cols = 0
+        self.move = 0
+        self._mines = set()
+        self._predicted = set()
+        self.tp = self.fp = self.fn = 0
+
+    def start_game(self, board):
+        """
+        Starts recording a new game.
+
+        Args:
+            board (Board): The board of the game, its mines are read once here.
+        """
+        self.game_id = uuid.uuid4().int >> 64
+        self.rows, self.cols = board.rows, board.cols
+        self.move = 0
+        self._mines = set(board.mine_cells())
+        self._predicted = set()
+        self.tp, self.fp, self.fn = 0, 0, len(self._mines)
+
+    def update_mines(self, board):
+        """
+        Re-reads the mines of the current game, which the first click may have moved.
+
+        The game id and move count are kept, so records made before the first
+        click stay with the game; the counts are redone for the current predictions.
+
+        Args:
+            board (Board): The board of the game.
+        """
+        self._mines = set(board.mine_cells())
+        self.tp = len(self._predicted & self._mines)
+        self.fp = len(self._predicted) - self.tp
+        self.fn = len(self._mines) - self.tp
+
+    def record(self, predicted, solve_time=0.0):
+        """
+        Records the predictions of one solver update.
+
+        Args:
+            predicted (iterable of tuples): Cells currently predicted to be mines.
+            solve_time (float): Seconds the solver took to produce them.
+
+        Returns:
+            float: Precision of the current predictions.
+        """
+        predicted = set(predicted)
+        for cell in predicted - self._predicted:
+            if cell in self._mines:
+                self.tp += 1
+                self.fn -= 1
+            else:
+                self.fp += 1
+        for cell in self._predicted - predicted:
+            if cell in self._mines:
+                self.tp -= 1
+                self.fn += 1
+            else:
+                self.fp -= 1
+        self._predicted = predicted
+
+        self.move += 1
+        self._buffer.append((
+            self.game_id, self.move, time.time(), 1000 * solve_time, self.rows, self.cols,
+            len(predicted), self.tp, self.fp, self.fn,
+        ))
+        if len(self._buffer) >= self.buffer_size:
+            self.flush()
+        return self.tp / len(predicted) if predicted else 0.0
+
+    def flush(self):
+        # Appends the buffered records to the log in one write
+        if not self._buffer:
+            return
+        if not self._checked:
+            self._check_log()
+        with open(self.filename, "ab") as file:
+            if file.tell() == 0:
+                file.write(HEADER.pack(MAGIC, VERSION, RECORD.itemsize))
+            np.array(self._buffer, dtype=RECORD).tofile(file)
+        self._buffer = []
+
+    def _check_log(self):
+        # Moves an existing log of another format out of the way before the first append
+        self._checked = True
+        if not os.path.exists(self.filename) or os.path.getsize(self.filename) == 0:
+            return
+        with open(self.filename, "rb") as file:
+            data = file.read(HEADER.size)
+        try:
+            _check_header(data, self.filename)
+        except ValueError as error:
+            os.replace(self.filename, f"{self.filename}.old")
+            print(f"{error}, moved to {self.filename}.old", file=sys.stderr)
+
+    def close(self):
+        self.flush()
+
+
+def _check_header(data, filename):
+    if len(data) < HEADER.size:
+        raise ValueError(f"{filename} is not a telemetry log")
+    magic, version, record_size = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError(f"{filename} is not a telemetry log")
+    if version != VERSION or record_size != RECORD.itemsize:
+        raise ValueError(f"Unsupported telemetry log version {version} in {filename}")
+
+
+def load(filename):
+    """
+    Maps a telemetry log into memory without parsing it.
+
+    Args:
+        filename (str): Log written by Telemetry.
+
+    Returns:
+        numpy.ndarray: Structured array of RECORD, backed by the file.
+    """
+    with open(filename, "rb") as file:
+        _check_header(file.read(HEADER.size), filename)
+    if os.path.getsize(filename) == HEADER.size:
+        return np.zeros(0, dtype=RECORD)  # A file with no records cannot be mapped
+    return np.memmap(filename, dtype=RECORD, mode="r", offset=HEADER.size)
+
+
+def aggregate(filename):
+    """
+    Summarises a telemetry log with vectorized reductions, fast even for millions of records.
+
+    Args:
+        filename (str): Log written by Telemetry.
+
+    Returns:
+        dict: Overall precision and recall, solve time statistics and per
+            board size precision.
+    """
+    records = load(filename)
+    if len(records) == 0:
+        return {"records": 0}
+    tp = records["tp"].astype(np.int64)
+    fp = records["fp"].astype(np.int64)
+    fn = records["fn"].astype(np.int64)
+    solve_ms = np.sort(records["solve_ms"])
+
+    sizes = {}
+    board_keys = records["rows"].astype(np.int64) << 32 | records["cols"]
+    for key in np.unique(board_keys):
+        selected = board_keys == key
+        positives = tp[selected].sum() + fp[selected].sum()
+        sizes[f"{key >> 32}x{key & 0xFFFFFFFF}"] = {
+            "records": int(selected.sum()),
+            "precision": float(tp[selected].sum() / positives) if positives else 0.0,
+        }
+
+    return {
+        "records": len(records),
+        "games": len(np.unique(records["game"])),
+        "precision": float(tp.sum() / max(1, tp.sum() + fp.sum())),
+        "recall": float(tp.sum() / max(1, tp.sum() + fn.sum())),
+        "solve_ms_mean": float(solve_ms.mean()),
+        "solve_ms_p95": float(percentile(solve_ms, 95)),
+        "solve_ms_p99": float(percentile(solve_ms, 99)),
+        "boards": sizes,
+    }
+
+
+if __name__ == "__main__":
+    for path in sys.argv[1:] or ["accuracy_log.bin"]:
+        print(path, aggregate(path))
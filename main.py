@@ -1,5 +1,12 @@
+import argparse
+
+from Autoplay import Autoplay
 from Game import Game
-from AISolver import AISolver 
+from PatternCache import PatternCache
+from Replay import FLAG, REVEAL, UNFLAG
+from Renderer import Renderer, get_font
+from SolverWorker import SolverWorker
+from Telemetry import Telemetry
 import pygame
 
 # Initialize pygame
@@ -11,31 +18,38 @@ WHITE = (255, 255, 255)
 GRAY = (192, 192, 192)
 BLACK = (0, 0, 0)
 FPS = 60
+NO_GUESS_FALLBACK = "Minesweeper - no guess-free board found in time, this one may need guesses"
         
-def main():
+def main(custom=None, no_guess=False, record="games.msr"):
+    # custom is an optional (rows, cols, mines) board offered in the menu,
+    # no_guess deals boards that can be cleared from the first click without guessing,
+    # every game played is appended to the record file for Replay.py (None to turn it off)
     game_instance = Game()  # Instantiate the Game class
+    telemetry = Telemetry()  # Buffered accuracy log, shared by every game
+    pattern_cache = PatternCache()  # Solved frontier patterns, reused from one game to the next
     running = True
     
     # Main loop
     while running:
-        grid_size, num_mines = game_instance.main_menu()
+        grid_size, num_mines = game_instance.main_menu(custom)
 
      
         # Adjust screen size and grid dimensions based on selected difficulty
         global WIDTH, HEIGHT, CELL_SIZE
-        CELL_SIZE = 30
+        size = grid_size if isinstance(grid_size, tuple) else (grid_size, grid_size)
+        CELL_SIZE = max(4, min(30, 1400 // size[1], 800 // size[0]))  # Shrink the cells of large boards to fit the screen
         screen = pygame.display.set_mode((WIDTH,HEIGHT))
         if isinstance(grid_size, tuple):  # For rectangular grids
             rows, cols = grid_size
-            WIDTH, HEIGHT = max(650, cols * CELL_SIZE + 200), rows * CELL_SIZE + 100  # Adjust screen size with extra space for button
+            WIDTH, HEIGHT = max(650, cols * CELL_SIZE + 200), max(300, rows * CELL_SIZE + 100)  # Adjust screen size with extra space for button
         else:
             rows = cols = grid_size
             WIDTH, HEIGHT = max(650, cols * CELL_SIZE + 200), rows * CELL_SIZE + 100  # Adjust screen size with extra space for button
 
         # Dynamically calculate the cell size based on the grid dimensions
-        CELL_SIZE = min(WIDTH // cols, (HEIGHT - 100) // rows)  # Define CELL_SIZE now
+        CELL_SIZE = min(WIDTH // cols, (HEIGHT - 100) // rows, CELL_SIZE)  # Define CELL_SIZE now
         # Use the calculated CELL_SIZE to adjust the screen dimensions
-        WIDTH, HEIGHT = max(650, cols * CELL_SIZE + 200), rows * CELL_SIZE + 100
+        WIDTH, HEIGHT = max(650, cols * CELL_SIZE + 200), max(300, rows * CELL_SIZE + 100)
 
         # Update the Game instance's CELL_SIZE and screen size
         game_instance.CELL_SIZE = CELL_SIZE
@@ -46,58 +60,112 @@ def main():
 
         # Initialize the grid with mines and numbers
         grid = game_instance.create_grid(rows, cols, num_mines)
-        solver = AISolver(grid)  # AI Solver instance
+        # The incremental mode keeps a Z3 variable per cell, large boards only encode their frontier
+        solver = SolverWorker(grid, mode="incremental" if rows * cols <= 10000 else "frontier", num_mines=num_mines,
+                              pattern_cache=pattern_cache)  # AI Solver in a background process
+        first_click = True  # Mines are moved away from the first click
         game_over = False
         game_won = False
         start_time = pygame.time.get_ticks()
         flagged_count = 0
         probable_mines = []
+        probabilities = {}
+        best_guess = None
         ai_solver_active = False
+        autoplay = None  # Set while the AI plays the board, toggled with the A key
         loss_time = None
         in_game = True
         
         def check_win_condition():
             #Checks if the game is won by verifying that all non-mine cells are revealed.
-            for row in grid:
-                for cell in row:
-                    if not cell["mine"] and not cell["revealed"]:
-                        return False  # A non-mine cell is not revealed
-            return True
-        with open("accuracy_data.txt", "a") as file:
-            file.write("GameData\n")
+            return grid.is_won()  # The board keeps count of revealed safe cells
+        telemetry.start_game(grid)
+        # The board is drawn incrementally, only what changed is sent to the display
+        renderer = Renderer(game_instance, grid, (WIDTH - (cols * CELL_SIZE)) // 2, 50)
+        ui_shown = None  # Timer and flag count the UI bar was last drawn with
+        screen.fill(WHITE)
+        pygame.display.flip()
         while in_game:
-            
-            
-            
-            screen.fill(WHITE)
-            
+            dirty_rects = []
 
             # Calculate elapsed time since game start
             elapsed_time = (pygame.time.get_ticks() - start_time) // 1000
 
-            # Draw the game grid and UI elements
-            game_instance.draw_grid(screen, grid)
-            menu_rect = game_instance.game_ui(screen, elapsed_time if not game_over else loss_time, flagged_count, num_mines)
+            # Apply the newest solver result, computed outside the UI process
+            moves = solver.poll()
+            autoplay_moves = moves if autoplay is not None else None
+            if moves is not None and ai_solver_active:
+                probable_mines = moves["mine_cells"]
+                probabilities = moves["probabilities"]
+                best_guess = moves["best_guess"]
+                renderer.set_overlay(probabilities, probable_mines, best_guess)
 
-            # Draw the AI Solver button
-            font = pygame.font.SysFont(None, 36)
-            ai_button_text = font.render("AI Solver", True, BLACK)
-            ai_button_rect = ai_button_text.get_rect(center=(WIDTH / 1.75, 25))
-            pygame.draw.rect(screen, GRAY, ai_button_rect.inflate(20, 10))
-            screen.blit(ai_button_text, ai_button_rect)
-        
-            
-            if ai_solver_active:
-                x_offset = (WIDTH - (cols * CELL_SIZE)) // 2
-                y_offset = 50
-                game_instance.highlight_probable_mines(screen, probable_mines, x_offset, y_offset, CELL_SIZE)
+                accuracy = telemetry.record(probable_mines, moves["solve_time"])
+
+            # Redraw the UI bar only when one of its values changed
+            thinking = (ai_solver_active or autoplay is not None) and solver.busy
+            ui_values = (elapsed_time if not game_over else loss_time, flagged_count, thinking)
+            if ui_values != ui_shown:
+                ui_shown = ui_values
+                screen.fill(WHITE, (0, 0, WIDTH, 50))
+                menu_rect = game_instance.game_ui(screen, ui_values[0], flagged_count, num_mines)
+
+                # Draw the AI Solver button
+                ai_button_text = get_font(36).render("AI Solver", True, BLACK)
+                ai_button_rect = ai_button_text.get_rect(center=(WIDTH / 1.75, 25))
+                pygame.draw.rect(screen, GRAY, ai_button_rect.inflate(20, 10))
+                screen.blit(ai_button_text, ai_button_rect)
+                if thinking:  # Show that a solve is pending
+                    thinking_text = get_font(24).render("thinking...", True, BLACK)
+                    screen.blit(thinking_text, thinking_text.get_rect(midleft=(ai_button_rect.right + 15, 25)))
+                dirty_rects.append(pygame.Rect(0, 0, WIDTH, 50))
+
+            # Autoplay: every answer of the solver process is played at once, then the board goes back to it
+            if autoplay_moves is not None and not game_over and not game_won:
+                played = autoplay.apply(autoplay_moves)
+                game_instance.moves += played
+                flagged_count = grid.flagged_count
+                if autoplay.lost:
+                    game_over = True
+                    game_instance.reveal_all_mines(grid)
+                    loss_time = elapsed_time
+                    loss_start_time = pygame.time.get_ticks()
+                elif check_win_condition():
+                    game_won = True
+                    in_game = False
+                elif autoplay.stuck:
+                    autoplay = None
+                else:
+                    solver.submit(grid, autoplay.changed, probabilities=ai_solver_active)
+
+            # Draw the cells that changed, AI highlights included
+            dirty_rects += renderer.draw(screen)
 
-            
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
                     running = False
                     in_game = False
+                    solver.stop()
+                    telemetry.close()
+                    if record:
+                        game_instance.save_game(grid, record)
                     return
+
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_a and not game_over:
+                    # Toggle autoplay, the solver process does the solving so the UI keeps its frame rate
+                    if autoplay is not None:
+                        autoplay = None
+                        continue
+                    autoplay = Autoplay(grid, num_mines, mode=None)  # Plays the answers of the solver process
+                    if first_click:
+                        first_click = False
+                        row, col = rows // 2, cols // 2
+                        if not game_instance.prepare_first_click(grid, row, col, no_guess):
+                            pygame.display.set_caption(NO_GUESS_FALLBACK)
+                        telemetry.update_mines(grid)  # The mines may have moved
+                        game_instance.record_move(REVEAL, row, col)
+                        grid.reveal(row, col)
+                    solver.submit(grid, probabilities=ai_solver_active)  # A rescan, so the first click and clicks made with the AI off are included
                 
                 elif event.type == pygame.MOUSEBUTTONDOWN:
                     x, y = event.pos
@@ -111,12 +179,14 @@ def main():
                     elif ai_button_rect.collidepoint(x, y):
                         ai_solver_active = not ai_solver_active  # Toggle AI solver
                         if ai_solver_active:
-                            # Update probable mines using the solver
-                            moves = solver.suggest_moves()
-                            probable_mines = moves["mine_cells"]
+                            # Ask the solver for probable mines, the result arrives on a later frame
+                            solver.submit(grid)
                         else:
                             # Clear the probable mines if AI solver is toggled off
                             probable_mines = []
+                            probabilities = {}
+                            best_guess = None
+                            renderer.set_overlay(probabilities, probable_mines, best_guess)
 
                     # Handle grid cell click
                     elif y > 50 and not game_over:
@@ -125,8 +195,15 @@ def main():
                         col = (x - x_offset) // CELL_SIZE
                         row = (y - y_offset) // CELL_SIZE
                         if 0 <= row < rows and 0 <= col < cols:
+                            changed = []
+                            if event.button == 1 and first_click:
+                                first_click = False
+                                if not game_instance.prepare_first_click(grid, row, col, no_guess):
+                                    pygame.display.set_caption(NO_GUESS_FALLBACK)
+                                telemetry.update_mines(grid)  # The mines may have moved, the game stays the same
                             if event.button == 1:  # Left click
                                 game_over = game_instance.handle_click(grid, x - x_offset, y - y_offset, game_over)
+                                changed = game_instance.last_revealed  # Only the cells this click revealed
                                 if game_over:
                                     game_instance.reveal_all_mines(grid)
                                     loss_time = elapsed_time
@@ -140,15 +217,13 @@ def main():
                                     else:
                                         cell["flagged"] = True
                                         flagged_count += 1
+                                    game_instance.record_move(FLAG if cell["flagged"] else UNFLAG, row, col)
+                                changed = [(row, col)]
                                         
-                            if ai_solver_active:
-                                moves = solver.suggest_moves()
-                                probable_mines = moves["mine_cells"]
-                                
-                            actual_mines = [(r, c) for r in range(rows) for c in range(cols) if grid[r][c]["mine"]]
-                            accuracy = solver.calculate_accuracy(actual_mines, probable_mines)
-                            
-                            solver.save_accuracy_to_file()
+                            if ai_solver_active or autoplay is not None:
+                                solver.submit(grid, changed, probabilities=ai_solver_active)  # Cancels the solve of the previous state
+                            else:
+                                accuracy = telemetry.record(probable_mines)
                             # Check for win condition
                             if check_win_condition():
                                 game_won = True
@@ -163,9 +238,29 @@ def main():
             
                 print("You win!")
             
-            pygame.display.flip()
+            if dirty_rects:
+                pygame.display.update(dirty_rects)
             clock.tick(FPS)
+
+        solver.stop()  # The solver process is not needed outside the game
+        telemetry.flush()
+        if record:
+            game_instance.save_game(grid, record)  # Replay it with `python Replay.py games.msr`
+        game_instance.moves = []
             
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Minesweeper with an AI assistant.")
+    parser.add_argument("--rows", type=int, help="Rows of a custom board, offered in the menu")
+    parser.add_argument("--cols", type=int, help="Columns of a custom board")
+    parser.add_argument("--mines", type=int, help="Mines of the custom board")
+    parser.add_argument("--density", type=float, default=0.2, help="Mine density of the custom board if --mines is not given")
+    parser.add_argument("--no-guess", action="store_true", help="Deal boards that never require a guess")
+    parser.add_argument("--record", default="games.msr", help="Append every game played to this replay file")
+    parser.add_argument("--no-record", action="store_true", help="Do not record the games")
+    args = parser.parse_args()
+    custom = None
+    if args.rows or args.cols:
+        rows, cols = args.rows or args.cols, args.cols or args.rows
+        custom = (rows, cols, args.mines if args.mines is not None else int(round(args.density * rows * cols)))
+    main(custom, args.no_guess, None if args.no_record else args.record)
     #entry point
\ No newline at end of file
@@ -0,0 +1,85 @@
+"""
+Checks the scanline flood fill of Board.reveal against a plain breadth-first reveal.
+
+Run with `python -m pytest -q`.
+"""
+import random
+from collections import deque
+
+import numpy as np
+
+from Board import Board
+
+BOARDS = range(400)
+
+
+def _reference_reveal(board, row, col):
+    # Breadth-first reveal on copies of the arrays: spreads through empty cells, skips flagged ones
+    revealed, flagged = board.revealed.copy(), board.flagged
+    if revealed[row, col] or flagged[row, col]:
+        return revealed, set()
+    opened = {(row, col)}
+    revealed[row, col] = True
+    queue = deque([(row, col)] if not board.mines[row, col] and board.numbers[row, col] == 0 else [])
+    while queue:
+        r, c = queue.popleft()
+        for nr in range(max(r - 1, 0), min(r + 2, board.rows)):
+            for nc in range(max(c - 1, 0), min(c + 2, board.cols)):
+                if revealed[nr, nc] or flagged[nr, nc]:
+                    continue
+                revealed[nr, nc] = True
+                opened.add((nr, nc))
+                if board.numbers[nr, nc] == 0:
+                    queue.append((nr, nc))
+    return revealed, opened
+
+
+def _board(seed):
+    # Mostly sparse boards so the fills are large, a fifth of them a single row or column
+    rng = random.Random(seed)
+    shape = rng.choice(["square", "square", "square", "row", "column"])
+    if shape == "row":
+        rows, cols = 1, rng.randint(1, 60)
+    elif shape == "column":
+        rows, cols = rng.randint(1, 60), 1
+    else:
+        rows, cols = rng.randint(2, 30), rng.randint(2, 30)
+    board = Board.create(rows, cols, density=rng.choice([0.0, 0.05, 0.1, 0.2]), rng=rng)
+    if rng.random() < 0.5:
+        for r in range(rows):
+            for c in range(cols):
+                if rng.random() < 0.08:
+                    board.set_flagged(r, c)  # Flags on mines and on safe cells alike
+    return board, rng
+
+
+def test_reveal_matches_breadth_first_reveal():
+    for seed in BOARDS:
+        board, rng = _board(seed)
+        safe = [(int(r), int(c)) for r, c in zip(*np.nonzero(~board.mines))]
+        rng.shuffle(safe)
+        for row, col in safe[:5]:
+            expected, opened = _reference_reveal(board, row, col)
+            revealed = board.reveal(row, col)
+            assert len(revealed) == len(set(revealed)), f"board {seed}, click {row, col}"
+            assert set(revealed) == opened, f"board {seed}, click {row, col}"
+            assert np.array_equal(board.revealed, expected), f"board {seed}, click {row, col}"
+            assert board.safe_revealed == int((board.revealed & ~board.mines).sum()), f"board {seed}"
+            assert not (board.revealed & board.flagged).any(), f"board {seed}"
+        assert board.is_won() == (board.safe_left() == 0)
+
+
+def test_reveal_ignores_cells_off_the_board_and_repeats():
+    board = Board(np.zeros((1, 5), dtype=bool))
+    assert board.reveal(0, 5) == [] and board.reveal(-1, 0) == []
+    assert sorted(board.reveal(0, 2)) == [(0, c) for c in range(5)]
+    assert board.reveal(0, 0) == []
+    assert board.safe_revealed == 5 and board.is_won()
+
+
+def test_flag_stops_the_fill():
+    # The flag splits the row, the fill does not cross it
+    board = Board(np.zeros((1, 7), dtype=bool))
+    board.set_flagged(0, 3)
+    assert sorted(board.reveal(0, 0)) == [(0, 0), (0, 1), (0, 2)]
+    assert board.safe_revealed == 3 and board.safe_left() == 4
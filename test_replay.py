@@ -0,0 +1,72 @@
+"""
+Checks that game records survive the binary format unchanged.
+
+Run with `python -m pytest -q`.
+"""
+import numpy as np
+
+import Replay
+from Replay import FLAG, REVEAL, UNFLAG, GameRecord
+
+
+def _record(rows, cols, moves, seed=None, density=0.2):
+    rng = np.random.default_rng(rows * 1000 + cols)
+    return GameRecord(rng.random((rows, cols)) < density, moves, seed)
+
+
+def _assert_same(decoded, record):
+    assert decoded.mines.shape == record.mines.shape
+    assert np.array_equal(decoded.mines, record.mines)
+    assert decoded.moves == record.moves
+    assert decoded.seed == record.seed
+
+
+def test_round_trip():
+    # Moves that jump back (negative zigzag deltas), far ahead (multi-byte varints) and hit every action
+    moves = [(REVEAL, 5, 5), (FLAG, 0, 0), (UNFLAG, 0, 0), (FLAG, 0, 1), (REVEAL, 39, 119), (REVEAL, 3, 2),
+             (UNFLAG, 0, 1), (REVEAL, 5, 4)]
+    for seed in (None, 0, 12345, 2 ** 64 - 1):
+        record = _record(40, 120, moves, seed)
+        data = record.to_bytes()
+        decoded, end = GameRecord.from_buffer(data)
+        assert end == len(data)
+        _assert_same(decoded, record)
+
+
+def test_round_trip_without_moves():
+    record = _record(1, 9, [])
+    decoded, end = GameRecord.from_buffer(record.to_bytes())
+    assert end == len(record.to_bytes())
+    _assert_same(decoded, record)
+
+
+def test_scan_and_load_concatenated_records(tmp_path):
+    filename = str(tmp_path / "games.msr")
+    records = [
+        _record(9, 9, [(REVEAL, 4, 4), (FLAG, 0, 0), (REVEAL, 8, 8)], seed=1),
+        _record(1, 30, [(REVEAL, 0, 29), (REVEAL, 0, 0), (UNFLAG, 0, 3)]),
+        _record(16, 30, [(FLAG, 15, 29), (UNFLAG, 15, 29), (REVEAL, 0, 0)], seed=7),
+    ]
+    Replay.save(records[:2], filename, append=False)
+    Replay.save(records[2:], filename)  # Appended after the first two
+
+    headers = list(Replay.scan(filename))
+    assert [(header["rows"], header["cols"], header["moves"]) for _, header in headers] == \
+        [(record.rows, record.cols, len(record.moves)) for record in records]
+    assert [header["num_mines"] for _, header in headers] == [record.num_mines for record in records]
+
+    for decoded, record in zip(Replay.load(filename), records):
+        _assert_same(decoded, record)
+    # Only the records asked for, through the offsets scan() found
+    offsets = [offset for offset, _ in headers]
+    [decoded] = Replay.load(filename, offsets[1:2])
+    _assert_same(decoded, records[1])
+
+
+def test_states_replay_the_moves():
+    record = _record(9, 9, [])
+    safe = [(int(r), int(c)) for r, c in zip(*np.nonzero(~record.mines))]
+    mine = tuple(int(v) for v in np.argwhere(record.mines)[0])
+    record.moves = [(FLAG, *mine), (REVEAL, *safe[0]), (UNFLAG, *mine)]
+    states = [(bool(board.flagged[mine]), bool(board.revealed[safe[0]]), move) for board, move, _ in record.states()]
+    assert states == [(True, False, record.moves[0]), (True, True, record.moves[1]), (False, True, record.moves[2])]
@@ -0,0 +1,165 @@
+"""
+Checks the solver against brute-force enumeration of every mine layout on small boards.
+
+Run with `python -m pytest -q`.
+"""
+import itertools
+import random
+
+import numpy as np
+import pytest
+
+from AISolver import AISolver
+from Board import Board
+from Frontier import Frontier
+from PatternCache import PatternCache
+
+POSITIONS = range(400)
+MAX_UNKNOWN = 12  # Hidden, unflagged cells left on a position, keeps the enumeration small
+
+
+def _position(seed):
+    # A board of at most 5x5 with random safe cells revealed and some mines flagged
+    rng = random.Random(seed)
+    rows, cols = rng.randint(2, 5), rng.randint(2, 5)
+    num_mines = rng.randint(1, max(1, rows * cols // 3))
+    board = Board.create(rows, cols, num_mines, rng=rng)
+    safe = [(int(r), int(c)) for r, c in zip(*np.nonzero(~board.mines))]
+    rng.shuffle(safe)
+    for r, c in safe[:rng.randint(1, len(safe))]:
+        board.reveal(r, c)
+    for r, c in safe:
+        if board.unknown.sum() <= MAX_UNKNOWN:
+            break
+        board.reveal(r, c)
+    for r, c in board.mine_cells():
+        if rng.random() < 0.3:
+            board.set_flagged(r, c)
+    return board
+
+
+def _constraints(board):
+    # (unknown neighbours, mines among them) for every revealed number, flags already subtracted
+    unknown = board.unknown
+    constraints = []
+    for r, c in zip(*np.nonzero(board.revealed)):
+        scope = [(r + dr, c + dc) for dr in (-1, 0, 1) for dc in (-1, 0, 1)
+                 if (dr or dc) and 0 <= r + dr < board.rows and 0 <= c + dc < board.cols]
+        flagged = sum(bool(board.flagged[cell]) for cell in scope)
+        constraints.append(([cell for cell in scope if unknown[cell]], int(board.numbers[r, c]) - flagged))
+    return constraints
+
+
+def _consistent(constraints, mines):
+    return all(sum(cell in mines for cell in scope) == count for scope, count in constraints)
+
+
+def _forced(board):
+    # Frontier cells that are safe, and that are mines, in every layout agreeing with the numbers
+    constraints = _constraints(board)
+    frontier = sorted({cell for scope, _ in constraints for cell in scope})
+    safe, mines = set(frontier), set(frontier)
+    for values in itertools.product((0, 1), repeat=len(frontier)):
+        layout = {cell for cell, value in zip(frontier, values) if value}
+        if _consistent(constraints, layout):
+            safe -= layout
+            mines &= layout
+    return {(int(r), int(c)) for r, c in safe}, {(int(r), int(c)) for r, c in mines}
+
+
+def _probabilities(board):
+    # Share of the layouts with exactly the remaining mine count that put a mine on each unknown cell
+    constraints = _constraints(board)
+    unknown = [(int(r), int(c)) for r, c in zip(*np.nonzero(board.unknown))]
+    remaining = board.num_mines - int(board.flagged.sum())
+    layouts = 0
+    tallies = dict.fromkeys(unknown, 0)
+    for combination in itertools.combinations(unknown, remaining):
+        layout = set(combination)
+        if _consistent(constraints, layout):
+            layouts += 1
+            for cell in combination:
+                tallies[cell] += 1
+    return {cell: tally / layouts for cell, tally in tallies.items()}
+
+
+@pytest.mark.parametrize("mode", AISolver.MODES)
+def test_exhaustive_deduction_matches_enumeration(mode):
+    for seed in POSITIONS:
+        board = _position(seed)
+        safe, mines = AISolver(board, mode=mode, exhaustive=True).deduce()
+        assert (set(safe), set(mines)) == _forced(board), f"position {seed}"
+
+
+def test_deduction_through_a_shared_pattern_cache():
+    # Every position twice, the second pass answered from the cache
+    pattern_cache = PatternCache()
+    for _ in range(2):
+        for seed in POSITIONS:
+            board = _position(seed)
+            safe, mines = AISolver(board, mode="frontier", exhaustive=True, pattern_cache=pattern_cache).deduce()
+            assert (set(safe), set(mines)) == _forced(board), f"position {seed}"
+    assert pattern_cache.hits
+
+
+def test_mine_probabilities_match_enumeration():
+    for seed in POSITIONS:
+        board = _position(seed)
+        probabilities = AISolver(board, mode="frontier", num_mines=board.num_mines).mine_probabilities()
+        for cell, expected in _probabilities(board).items():
+            assert probabilities[cell] == pytest.approx(expected, abs=1e-9), f"position {seed}, cell {cell}"
+
+
+def test_rule_tiers_are_sound():
+    for seed in POSITIONS:
+        board = _position(seed)
+        safe, mines = _forced(board)
+        local_safe, local_mines = Frontier(board).apply_local_rules()
+        assert local_safe <= safe and local_mines <= mines, f"position {seed}"
+        pairwise_safe, pairwise_mines = Frontier(board).apply_pairwise_rules()
+        assert pairwise_safe <= safe and pairwise_mines <= mines, f"position {seed}"
+        assert local_safe <= pairwise_safe and local_mines <= pairwise_mines, f"position {seed}"
+
+
+def test_incremental_updates_match_frontier_mode():
+    # One incremental solver follows each game through update(cells) only, flags and un-flags included
+    for seed in range(40):
+        rng = random.Random(seed)
+        rows, cols = rng.randint(4, 8), rng.randint(4, 8)
+        board = Board.create(rows, cols, rng.randint(2, rows * cols // 4), rng=rng)
+        # No pattern cache, so every deduction reaches the persistent Z3 solver
+        solver = AISolver(board, mode="incremental", exhaustive=True, pattern_cache=PatternCache(maxsize=0))
+        solver.deduce()  # The first call scans the empty board, everything after comes through update()
+        cells = [(r, c) for r in range(rows) for c in range(cols)]
+        rng.shuffle(cells)
+        for move, (r, c) in enumerate(cells):
+            if board.revealed[r, c]:
+                continue  # Opened by an earlier flood fill
+            if board.mines[r, c]:
+                board.set_flagged(r, c, not board.flagged[r, c])
+                changed = [(r, c)]
+            else:
+                if rng.random() < 0.15:
+                    # A wrong flag, solved with once and taken back before the cell is opened
+                    board.set_flagged(r, c)
+                    solver.update([(r, c)])
+                    solver.deduce()
+                    board.set_flagged(r, c, False)
+                changed = [(r, c)] + board.reveal(r, c)
+            solver.update(changed)
+            expected = AISolver(board, mode="frontier", exhaustive=True).deduce()
+            assert solver.deduce() == expected, f"game {seed}, move {move}"
+
+
+@pytest.mark.parametrize("mode", AISolver.MODES)
+def test_encoding_instance_loads_z3(mode, monkeypatch):
+    # An Encoding instance skips the name lookup, Z3 must still be loaded before the first solve
+    import AISolver as solver_module
+    from Encodings import PseudoBooleanEncoding
+
+    board = next(board for board in map(_position, POSITIONS) if Frontier(board).components)
+    monkeypatch.setattr(solver_module, "z3", None)
+    solver = AISolver(board, mode=mode, encoding=PseudoBooleanEncoding(), exhaustive=True)
+    solver.identify_mines()
+    safe, mines = solver.deduce()
+    assert (set(safe), set(mines)) == _forced(board)
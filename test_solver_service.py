@@ -0,0 +1,56 @@
+"""
+Checks the solver service end to end over a Unix socket.
+
+Run with `python -m pytest -q`.
+"""
+import asyncio
+import os
+import random
+
+import pytest
+
+from AISolver import AISolver
+from Board import Board
+from SolverService import SolverClient, SolverService
+
+
+async def _with_service(path, play, workers=1):
+    service = SolverService(workers=workers)
+    await service.start(path)
+    client = await SolverClient.connect(path)
+    try:
+        return await play(service, client)
+    finally:
+        await client.close()
+        await service.close()
+
+
+@pytest.mark.parametrize("shape", [(1, 70000), (70000, 1)])
+def test_boards_wider_than_16_bits(tmp_path, shape):
+    board = Board.create(*shape, 7000, rng=random.Random(1), safe_cell=(shape[0] // 2, shape[1] // 2))
+    board.reveal(shape[0] // 2, shape[1] // 2)
+    expected = AISolver(board.copy(), mode="frontier", num_mines=7000).suggest_moves()
+
+    async def play(service, client):
+        return await client.suggest(1, board, 7000)
+
+    moves = asyncio.run(_with_service(str(tmp_path / "solver.sock"), play))
+    assert moves["safe_cells"] == expected["safe_cells"] and moves["mine_cells"] == expected["mine_cells"]
+    assert moves["best_guess"] == expected["best_guess"]
+
+
+def test_dead_worker_is_replaced(tmp_path):
+    board = Board.create(16, 30, 99, rng=random.Random(2), safe_cell=(8, 15))
+    board.reveal(8, 15)
+
+    async def play(service, client):
+        before = await client.suggest(1, board, 99)
+        # Ends the worker process the way a crash would
+        with pytest.raises(Exception):
+            await asyncio.wrap_future(service._executors[0].submit(os._exit, 1))
+        with pytest.raises(RuntimeError):
+            await client.suggest(1, board, 99)  # Answered by the dead worker
+        return before, await client.suggest(1, board, 99)
+
+    before, after = asyncio.run(_with_service(str(tmp_path / "solver.sock"), play))
+    assert after["safe_cells"] == before["safe_cells"] and after["mine_cells"] == before["mine_cells"]
@@ -0,0 +1,76 @@
+"""
+Checks that the solver process always answers the newest request, even when solving fails.
+
+Run with `python -m pytest -q`.
+"""
+import multiprocessing
+import random
+import time
+
+import pytest
+
+from AISolver import AISolver
+from Board import Board
+from PatternCache import PatternCache
+from SolverWorker import SolverWorker
+
+
+def _board():
+    board = Board.create(16, 30, 99, rng=random.Random(3), safe_cell=(8, 15))
+    board.reveal(8, 15)
+    return board
+
+
+def _wait(worker, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        result = worker.poll()
+        if result is not None:
+            return result
+        time.sleep(0.01)
+    raise AssertionError("no answer from the solver process")
+
+
+def test_answers_and_returns_cache_entries():
+    board = _board()
+    pattern_cache = PatternCache()
+    worker = SolverWorker(board, mode="frontier", num_mines=99, pattern_cache=pattern_cache)
+    try:
+        worker.submit(board)
+        result = _wait(worker)
+        expected = AISolver(board.copy(), mode="frontier", num_mines=99).suggest_moves()
+        assert result["safe_cells"] == expected["safe_cells"] and result["mine_cells"] == expected["mine_cells"]
+        assert result["probabilities"] and not worker.busy
+        assert pattern_cache.stats()["size"]  # What the solver process learned came back
+
+        worker.submit(board, [], probabilities=False)
+        assert _wait(worker)["probabilities"] == {}
+    finally:
+        worker.stop()
+
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != "fork", reason="the patch must reach the solver process")
+def test_failed_solve_is_answered(monkeypatch):
+    def fail(self):
+        raise RuntimeError("solver bug")
+
+    monkeypatch.setattr(AISolver, "suggest_moves", fail)
+    board = _board()
+    worker = SolverWorker(board, mode="frontier", num_mines=99)
+    try:
+        worker.submit(board)
+        result = _wait(worker)
+        assert "solver bug" in result["error"] and result["safe_cells"] == [] and not worker.busy
+    finally:
+        worker.stop()
+
+
+def test_dead_solver_process_is_answered():
+    board = _board()
+    worker = SolverWorker(board, mode="no such mode", num_mines=99)  # The solver process fails to start
+    try:
+        for _ in range(2):
+            worker.submit(board)
+            assert _wait(worker)["error"] and not worker.busy
+    finally:
+        worker.stop()
@@ -0,0 +1,55 @@
+"""
+Checks the telemetry log format.
+
+Run with `python -m pytest -q`.
+"""
+import os
+import random
+
+import numpy as np
+import pytest
+
+import Telemetry
+from Board import Board
+
+
+def _play(filename, moves=5, buffer_size=2):
+    board = Board.create(9, 9, 10, rng=random.Random(0))
+    telemetry = Telemetry.Telemetry(filename, buffer_size=buffer_size)
+    telemetry.start_game(board)
+    mines = board.mine_cells()
+    for move in range(moves):
+        telemetry.record(mines[:move] + [(0, 0)], 0.001 * move)
+    telemetry.close()
+    return telemetry
+
+
+def test_records_round_trip_after_a_header(tmp_path):
+    filename = str(tmp_path / "accuracy_log.bin")
+    telemetry = _play(filename)
+    _play(filename)  # A second session appends, the header is written once
+    assert os.path.getsize(filename) == Telemetry.HEADER.size + 10 * Telemetry.RECORD.itemsize
+    records = Telemetry.load(filename)
+    assert len(records) == 10
+    assert records["rows"].tolist() == [9] * 10 and records["cols"].tolist() == [9] * 10
+    assert records["move"].tolist() == [1, 2, 3, 4, 5] * 2
+    assert records[4]["tp"] == telemetry.tp and records[4]["fn"] == telemetry.fn
+    assert Telemetry.aggregate(filename)["games"] == 2
+
+
+def test_log_of_another_format_is_moved_aside(tmp_path):
+    filename = str(tmp_path / "accuracy_log.bin")
+    legacy = np.zeros(3, dtype=[("game", "<u8"), ("move", "<u4"), ("rows", "<u2"), ("cols", "<u2")])
+    legacy.tofile(filename)  # Headerless, as version 1 wrote it
+    with pytest.raises(ValueError):
+        Telemetry.load(filename)
+    _play(filename)
+    assert len(Telemetry.load(filename)) == 5
+    assert os.path.getsize(filename + ".old") == legacy.nbytes
+
+
+def test_empty_log(tmp_path):
+    filename = str(tmp_path / "accuracy_log.bin")
+    with open(filename, "wb") as file:
+        file.write(Telemetry.HEADER.pack(Telemetry.MAGIC, Telemetry.VERSION, Telemetry.RECORD.itemsize))
+    assert Telemetry.aggregate(filename) == {"records": 0}